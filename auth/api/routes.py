@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Depends, status, HTTPException, Request, Cookie
-from fastapi.encoders import jsonable_encoder as jEnc
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, status, HTTPException, Request, Cookie, Query
+from starlette.concurrency import run_in_threadpool
 
-from sql_app.database import get_db
+from sql_app.database import get_async_read_db, get_read_db, get_session, has_replicas, mark_write, wrote_recently
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from auth import schemas, models, crud
-from core.config import JsonRender
+from core.config import JsonRender, OrjsonResponse, settings
+from core.bulk import chunked, iter_records
+from core.conditional import CACHE_CONTROL, if_none_match, make_etag, not_modified
+from core.pagination import encode_cursor, decode_cursor
+from sql_app.query_budget import query_budget
 
 NAMESPACE = f"Auth Routes"
 
@@ -43,22 +48,51 @@ async def checkAuthorization(request: Request, Authorization=Cookie(None)) -> st
             detail=f"Token invalid", status_code=status.HTTP_401_UNAUTHORIZED)
 
 
-async def getCurrentUser(token=Depends(checkAuthorization), db: Session = Depends(get_db)) -> UserModel:
+async def readsPrimary(LastWrite=Cookie(None)) -> bool:
     """
-     Get the user associated with the token. This is a wrapper around the CRUD method retrieve_user
-     
-     Args:
-     	 token: The token to use for the retrieval
-     	 db: The database to use for the retrieval. Defaults to : data : ` get_db `
+     Whether the request's reads go to the primary: the client wrote within the last
+     DB_READ_YOUR_WRITES seconds, as told by the LastWrite cookie mark_write sets.
+    """
+    return has_replicas() and wrote_recently(LastWrite)
+
+
+# Read-only session dependency: a replica session, or the primary within the read-your-writes window.
+if settings.DB_ASYNC:
+    async def getReadSession(primary: bool = Depends(readsPrimary)):
+        async for db in get_async_read_db(primary):
+            yield db
+else:
+    def getReadSession(primary: bool = Depends(readsPrimary)):
+        yield from get_read_db(primary)
+
+
+async def resolveUser(token: str, db: Session | AsyncSession, load: str = "identity") -> UserModel:
+    """
+     Get the user associated with the token, first consulting the UserCache, keyed by the
+     token's UUID and the loading strategy, then loading it with crud.UserLoaders[load].
+     Revoked tokens are refused from the in-memory crud.RevokedTokens store, without a query.
      
      Returns: 
-     	 The user associated with the token or None if there is which will then return an
-       HTTPException of HTTP_500_INTERNAL_SERVER_ERROR.
+     	 The user associated with the token, or raises an HTTPException of
+       HTTP_401_UNAUTHORIZED when the token was revoked, HTTP_503_SERVICE_UNAVAILABLE while
+       the revoked tokens can't be loaded or HTTP_500_INTERNAL_SERVER_ERROR.
     """
+    # The startup load of the revoked tokens failed; retry it, and refuse tokens until it succeeds.
+    if not crud.RevokedTokens.ready:
+        await run_in_threadpool(crud.RevokedTokens.refresh)
+        if not crud.RevokedTokens.ready:
+            raise HTTPException(detail="Token revocations unavailable", status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    if crud.AuthHandler().is_revoked(token):
+        raise HTTPException(detail="Token has been revoked", status_code=status.HTTP_401_UNAUTHORIZED)
     try:
         decodedToken: dict = crud.AuthHandler().decode_token(token)
-        decodedUser = crud.UserCRUD.retrieve_User(
-            db, username=decodedToken.get("username"))
+        decodedUser = crud.UserCache.get((decodedToken.get("uuid"), load))
+        # On a cache miss load the user and cache it for the following requests.
+        if decodedUser is None:
+            decodedUser = await crud.AsyncUserCRUD.retrieve_User(
+                db, username=decodedToken.get("username"), load=load)
+            if decodedUser:
+                crud.UserCRUD.cache_User(decodedToken.get("uuid"), decodedUser, load)
         return decodedUser
     # HTTPExceprion HTTP_500_INTERNAL_SERVER_ERROR if no User was recovered
     except:
@@ -66,13 +100,93 @@ async def getCurrentUser(token=Depends(checkAuthorization), db: Session = Depend
                             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+async def conditionalUser(request: Request, token: str, db: Session | AsyncSession, load: str):
+    """
+     Resolve the user for a conditional GET. When the request carries If-None-Match,
+     only the users row is looked up first, so a current client gets its 304 before
+     the heavier load strategy runs or anything is serialized.
+     
+     Returns: 
+     	 A tuple of the user loaded with load, or None when not modified, and its ETag.
+    """
+    header = request.headers.get("If-None-Match")
+    if header:
+        identity = await resolveUser(token, db, "identity")
+        etag = make_etag(identity.pk, identity.version, load) if identity else None
+        if etag and if_none_match(header, etag):
+            return None, etag
+    User = await resolveUser(token, db, load)
+    if not User:
+        raise HTTPException(detail="Internal Error", status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return User, make_etag(User.pk, User.version, load)
+
+
+def currentUserLoader(load: str = "identity", session=getReadSession):
+    """
+     Build a getCurrentUser dependency that loads the user with the given UserLoaders
+     strategy, so each route only pays for the relationships it actually uses.
+     
+     Args:
+     	 load: The strategy name within crud.UserLoaders
+     	 session: The session dependency to load with, a read session unless the route writes
+     
+     Returns: 
+     	 The getCurrentUser dependency for that strategy.
+    """
+    async def getCurrentUser(token=Depends(checkAuthorization), db: Session | AsyncSession = Depends(session)) -> UserModel:
+        """
+         Get the user associated with the token. This is a wrapper around resolveUser
+         with the loading strategy of this dependency.
+         
+         Args:
+         	 token: The token to use for the retrieval
+         	 db: The database to use for the retrieval. Defaults to : data : ` get_db `
+         
+         Returns: 
+         	 The user associated with the token or None if there is which will then return an
+           HTTPException of HTTP_500_INTERNAL_SERVER_ERROR.
+        """
+        return await resolveUser(token, db, load)
+    return getCurrentUser
+
+
+# Identity only lookup for auth checks, the user's profile, and the full user graph.
+getCurrentUser = currentUserLoader("identity")
+getCurrentUserProfile = currentUserLoader("profile")
+getCurrentUserGraph = currentUserLoader("full")
+# The user, or their profile, loaded from the primary, for routes that go on to write.
+getCurrentUserWriter = currentUserLoader("identity", get_session)
+getCurrentUserProfileWriter = currentUserLoader("profile", get_session)
+
+
+async def getCurrentAdmin(User=Depends(getCurrentUser)) -> UserModel:
+    """
+     Get the current user, raising an HTTPException unless they are an admin.
+    """
+    if not User or not User.isAdmin:
+        raise HTTPException(detail="Admin access required", status_code=status.HTTP_403_FORBIDDEN)
+    return User
+
+
 @router.get("/")
 async def get_auth():
     return "auth app created!"
 
 
+@router.get("/cache")
+async def getCacheStats():
+    """
+     Report the hit, miss and eviction counters of the authenticated user cache,
+     used to size USER_CACHE_SIZE and USER_CACHE_TTL, and the state of the
+     lastLogin write-behind buffer and the revoked token store.
+    """
+    return OrjsonResponse({"data": {**crud.UserCache.stats(), "lastLogin": crud.LoginBuffer.stats(),
+                                    "revokedTokens": crud.RevokedTokens.stats()}}, status.HTTP_200_OK)
+
+
 @router.post("/register")
-async def Register(request: schemas.UserCreate, db: Session = Depends(get_db)):
+@query_budget(3)
+async def Register(request: schemas.UserCreate, db: Session | AsyncSession = Depends(get_session)):
     """
      Register a new user. This will check to make sure email and username are not already in use
      as well as check to ensure the psw and re_psw are equivalient.
@@ -85,31 +199,34 @@ async def Register(request: schemas.UserCreate, db: Session = Depends(get_db)):
       successfully created string, but on error will raise an Exception whilist delivering an detail 
       object .
     """
-    dbEmailQuery: UserModel = db.query(UserModel).filter(
-        UserModel.email == request.email).scalar() or None
-    dbUsernameQuery: UserModel = db.query(UserModel).filter(
-        UserModel.username == request.username).scalar() or None
-    # Checks if the database email and username query are in use.
-    if dbEmailQuery or dbUsernameQuery or (request.psw != request.re_psw):
-        # If the email is already in use raise an HTTPException.
-        if dbEmailQuery:
-            raise HTTPException(
-                detail=f"Email, {dbEmailQuery.email}, is already in use", status_code=status.HTTP_409_CONFLICT)
-        # If the username is already in use raise an HTTPException.
-        if dbUsernameQuery:
-            raise HTTPException(
-                detail=f"Username, {dbUsernameQuery.username}, is already in use", status_code=status.HTTP_409_CONFLICT)
-                        # If the passwords dont match raise an HTTPException.
+    # If the passwords dont match raise an HTTPException, before any database work.
+    if request.psw != request.re_psw:
         raise HTTPException(
             detail="Passwords don't match; Passwords must be the same", status_code=status.HTTP_409_CONFLICT)
-    _user = crud.UserCRUD.create_User(db, request)
-    return JSONResponse({
-        "data": f"User, {_user.username}, has been created!"
+    # A single probe checks whether the email or username are already in use.
+    conflicts = await crud.AsyncUserCRUD.registration_Conflicts(db, request.email, request.username)
+    if any(email == request.email for email, _ in conflicts):
+        raise HTTPException(
+            detail=f"Email, {request.email}, is already in use", status_code=status.HTTP_409_CONFLICT)
+    if conflicts:
+        raise HTTPException(
+            detail=f"Username, {request.username}, is already in use", status_code=status.HTTP_409_CONFLICT)
+    try:
+        await crud.AsyncUserCRUD.create_User(db, request)
+    # A concurrent registration took the email or username after the probe.
+    except IntegrityError:
+        raise HTTPException(
+            detail="Email or Username is already in use", status_code=status.HTTP_409_CONFLICT)
+    res = OrjsonResponse({
+        "data": f"User, {request.username}, has been created!"
     }, status.HTTP_201_CREATED)
+    mark_write(res)
+    return res
 
 
 @router.post("/token")
-async def token(request: schemas.UserLogin, db: Session = Depends(get_db)):
+@query_budget(3)
+async def token(request: schemas.UserLogin, db: Session | AsyncSession = Depends(get_session)):
     """
     Return JWT token for user. This authorization token is used to ensure the necessary 
     privleges is provided to the specific user so they can access protected content 
@@ -124,110 +241,188 @@ async def token(request: schemas.UserLogin, db: Session = Depends(get_db)):
         Username, but on failure a detail object will be return with a reason of it's failure.
     """
 
-    user: UserModel = crud.UserCRUD.retrieve_User(db, email=request.username
-                                                  ) if "@" in str(request.username) else crud.UserCRUD.retrieve_User(db, username=request.username)
-    checkPassword = crud.AuthHandler().verify_password(psw=request.password,
-                                                        hashed_psw=user.password) if (user) else None
+    user: UserModel = await crud.AsyncUserCRUD.retrieve_User(db, email=request.username, load="identity"
+                                                             ) if "@" in str(request.username) else await crud.AsyncUserCRUD.retrieve_User(db, username=request.username, load="identity")
+    checkPassword = await crud.AuthHandler().verify_password_async(psw=request.password,
+                                                                    hashed_psw=user.password) if (user) else None
     # Check if password is valid; if not retry
     if not checkPassword:
         raise HTTPException(detail="Password or Username doesn't match; Check credintials and retry",
             status_code=status.HTTP_409_CONFLICT)
     #Update User's lastLogin field within the data base then encode the jwt which will be provide in the reponse
-    crud.UserCRUD.lastLogin(db, user.username)
+    await crud.AsyncUserCRUD.lastLogin(db, user.username)
     jwt = crud.AuthHandler().encode_token(user.UUID, user.username)
     content = {"data": {
         "username": f"{user.username}", "token": f"bearer {jwt}"}}
-    res = JSONResponse(content, status_code=status.HTTP_302_FOUND)
+    res = OrjsonResponse(content, status_code=status.HTTP_302_FOUND)
     res.set_cookie(key="Authorization", value=jwt, secure=True, httponly=True)
+    mark_write(res)
     return res
 
 
 @router.get("/protected")
+@query_budget(1)
 async def protectedRoute(decoded=Depends(getCurrentUser)):
     data = decoded
     if not data:
         raise HTTPException(detail="uhh some went wrong!", status_code=status.HTTP_400_BAD_REQUEST)
-    return JSONResponse({"data": "lets go!"}, status_code=status.HTTP_200_OK)
+    return OrjsonResponse({"data": "lets go!"}, status_code=status.HTTP_200_OK)
 
 
 @router.post("/logout")
-async def logout(decoded: dict = Depends(getCurrentUser)):
+@query_budget(2)
+async def logout(token=Depends(checkAuthorization), decoded: dict = Depends(getCurrentUserWriter),
+                 db: Session | AsyncSession = Depends(get_session)):
     """
-     Logs out the user from the API. This is a no - op if the user isn't logged in
+     Logs out the user from the API. The token is revoked until it expires, so a
+     copy of it can't be used again, and the Authorization cookie is deleted.
 
      Args:
+     	 token: The token being logged out
      	 decoded: The decoded data from the request
+     	 db: The session the revocation is recorded with
 
      Returns: 
      	 A response containing a sting with the user's username that
        has been logged out
     """
+    await crud.AsyncTokenCRUD.revoke_Token(db, token)
     username = decoded.username
     content = {"data": f"{username} has been Logged out"}
-    res = JSONResponse(content, status.HTTP_202_ACCEPTED)
+    res = OrjsonResponse(content, status.HTTP_202_ACCEPTED)
     res.delete_cookie("Authorization")
     return res
 
 
 @router.get("/retrieve_user", response_class=JsonRender, response_model=schemas.UserBase, response_model_exclude=["user_profile", "isAdmin", "password"])
-async def retrieveUserData(request: Request, User=Depends(getCurrentUser)) -> schemas.UserBase:
+@query_budget(2)
+async def retrieveUserData(request: Request, token=Depends(checkAuthorization),
+                           db: Session | AsyncSession = Depends(getReadSession)) -> schemas.UserBase:
     """
      Retrieves the user data. This is called by User Arg and should return the user data as a 
      dictionary based on the schema of UserBase, so we do this by using the reponse_model, 
      but there are fields that we do not want to pass to the standard user. So we utilize the, 
      reponse_model_exclude Argument, to leave out the following fields: isAdmin, password, and 
-     user_profile
+     user_profile. The payload itself is built by schemas.UserPublic, which applies the same
+     exclusions straight from the ORM row instead of re-validating it against the response_model.
+     
+     The response carries an ETag from the user's version; a matching If-None-Match gets
+     a 304 without the profile being loaded.
      
      Args:
      	 request: The request being processed. Used to determine if we are in a context where user data is available or not.
-     	 User: The user that should be returned. If not provided it will be determined based on the current user.
+     	 token: The authorization token of the user to return
+     	 db: The read session to load the user with
      
      Returns: 
      	 Returns the User within the custom JsonRender response class which on success will provide
        a data Json object but on failure will provide a detail object containing the reason of the exception 
     """
-    return User
+    User, etag = await conditionalUser(request, token, db, "profile")
+    if User is None:
+        return not_modified(etag)
+    # Rendered by the precompiled UserPublic serializer; the response_model only documents it.
+    return JsonRender(schemas.UserPublic(User), status.HTTP_200_OK,
+                      headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
 
 
 @router.get("/retrieve_user/all")
-async def retrieveAllUserData(request: Request, User=Depends(getCurrentUser)):
+@query_budget(3)
+async def retrieveAllUserData(request: Request, token=Depends(checkAuthorization),
+                              db: Session | AsyncSession = Depends(getReadSession)):
     """
      Retrieve all user data. This is used to retrieve all user of a Users data
-     that the user has access to.
+     that the user has access to. Conditional on If-None-Match like /retrieve_user.
      
      Args:
      	 request: The request for this request. ( required )
-     	 User: The user to retrieve data for. ( optional )
+     	 token: The authorization token of the user to retrieve data for
+     	 db: The read session to load the user graph with
      
      Returns: 
      	 A JSON response with the user data in the format : { " data " : json. dumps ( user )
     """
-    decodedUser = jEnc(User)
-    content = {"data": decodedUser}
-    return JSONResponse(content, status.HTTP_200_OK)
+    User, etag = await conditionalUser(request, token, db, "full")
+    if User is None:
+        return not_modified(etag)
+    # Rendered straight from the ORM graph by orjson, without jsonable_encoder.
+    return JsonRender(User, status.HTTP_200_OK, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
 
 
 @router.get("/users_all", response_class=JsonRender)
-async def getAllUsers(request: Request, db: Session = Depends(get_db)):
+@query_budget(3)
+async def getAllUsers(request: Request, db: Session | AsyncSession = Depends(getReadSession),
+                      limit: int = Query(settings.USERS_PAGE_SIZE, ge=1, le=settings.USERS_PAGE_MAX),
+                      cursor: str | None = Query(None), fields: str | None = Query(None)):
     """
-     Grab all users from the database. This is used to grab a list of all users that are in the database
+     Grab a page of users from the database. Users are paginated by keyset on their pk, so
+     every page costs the same regardless of how many users the table holds.
      
      Args:
      	 request: HTTP request from client ( unused )
-     	 db: SQLAlchemy session to use ( unused )
+     	 db: SQLAlchemy session to use
+     	 limit: Page size, capped at USERS_PAGE_MAX
+     	 cursor: Opaque cursor from a previous page's X-Next-Cursor header
+     	 fields: Optional comma separated list of columns to project, e.g. fields=pk,username
      
      Returns: 
-     	 List of UserModel's with information about their specific User
+     	 List of users with their profiles, or dicts of the requested fields, never including
+       the password hash. The X-Next-Cursor header is set when a further page exists.
     """
-    grabUsers: list = db.query(UserModel).all()
+    try:
+        after_pk = int(decode_cursor(cursor)["pk"]) if cursor else None
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(detail="Invalid cursor", status_code=status.HTTP_400_BAD_REQUEST)
+    _fields = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    # Projections always carry the pk so the next cursor can be built.
+    if _fields and "pk" not in _fields:
+        _fields.append("pk")
+    try:
+        grabUsers: list = await crud.AsyncUserCRUD.retrieve_Users_Page(db, limit, after_pk, _fields)
+    except ValueError as exc:
+        raise HTTPException(detail=str(exc), status_code=status.HTTP_400_BAD_REQUEST)
     # This method will raise an HTTPException if the user is not grabUsers
-    if not grabUsers:
+    if not grabUsers and not cursor:
         raise HTTPException(detail="Something went wrong, please Try again later", status_code=status.HTTP_400_BAD_REQUEST)
-    return grabUsers
+    res = JsonRender(grabUsers[:limit], status.HTTP_200_OK)
+    if len(grabUsers) > limit:
+        last = grabUsers[limit - 1]
+        res.headers["X-Next-Cursor"] = encode_cursor(pk=last["pk"])
+    return res
+
+
+@router.post("/retrieve_users")
+@query_budget(-(-settings.USERS_LOOKUP_MAX // settings.USERS_LOOKUP_CHUNK) + 1)
+async def retrieveUsers(request: schemas.UsersLookup, db: Session | AsyncSession = Depends(getReadSession),
+                        decoded=Depends(getCurrentUser)):
+    """
+     Resolve a batch of users by UUID for downstream services, in place of one
+     /retrieve_user round trip per user. The UUIDs are looked up with one IN query per
+     USERS_LOOKUP_CHUNK of them, projecting only the requested fields.
+     
+     Args:
+     	 request: The UUIDs to resolve, at most USERS_LOOKUP_MAX, and the fields to return,
+       e.g. {"UUIDs": [...], "fields": ["username", "email"]}; every field but the password
+       when fields is omitted
+     	 db: The read session to look the users up with
+     	 decoded: The authenticated caller
+     
+     Returns: 
+     	 A data object mapping each requested UUID to its user's fields, or to null
+       when no user has that UUID.
+    """
+    # At most USERS_LOOKUP_MAX UUIDs, as checked by the UsersLookup schema.
+    UUIDs = list(dict.fromkeys(request.UUIDs))
+    try:
+        users: dict = await crud.AsyncUserCRUD.retrieve_Users_By_UUID(db, UUIDs, request.fields)
+    except ValueError as exc:
+        raise HTTPException(detail=str(exc), status_code=status.HTTP_400_BAD_REQUEST)
+    return OrjsonResponse({"data": {UUID: users.get(UUID) for UUID in UUIDs}}, status.HTTP_200_OK)
 
 
 @router.patch("/patch_profile", response_class=JsonRender, response_model=schemas.ProfileBase, response_model_exclude=["pk", "user_pk", "stripe_Cust_ID"] )
-async def patchProfile(req:schemas.PatchProfile, db:Session=Depends(get_db), decodeUser:schemas.UserBase=Depends(getCurrentUser)):
+@query_budget(5)
+async def patchProfile(req:schemas.PatchProfile, db:Session | AsyncSession=Depends(get_session), decodeUser:schemas.UserBase=Depends(getCurrentUserProfileWriter)):
     """
      Updates a User's Profile in the Database This is a wrapper around CRUD's patch_profile method
      Also checks weather the keys in the data to update dict is areaddy stored in the decodedUserprofile
@@ -249,5 +444,101 @@ async def patchProfile(req:schemas.PatchProfile, db:Session=Depends(get_db), dec
     # If the user profile is already stored within the database raise an HTTPException.
     if all((key, value) in decodedUserProfile for (key,value) in data_to_update.items()):
         raise HTTPException(status.HTTP_406_NOT_ACCEPTABLE, "Value's already stored within Database")
-    _profile = crud.ProfileCRUD.patch_profile(db, req, decodeUser.pk)
-    return _profile
\ No newline at end of file
+    _profile = await crud.AsyncProfileCRUD.patch_profile(db, req, decodeUser.pk)
+    res = JsonRender(schemas.ProfilePatched(_profile), status.HTTP_200_OK)
+    mark_write(res)
+    return res
+
+
+@router.get("/addresses", response_class=JsonRender)
+@query_budget(2)
+async def getAddresses(db: Session | AsyncSession = Depends(getReadSession), User=Depends(getCurrentUserProfile),
+                       limit: int = Query(settings.ADDRESSES_PAGE_SIZE, ge=1, le=settings.ADDRESSES_PAGE_MAX),
+                       cursor: str | None = Query(None)):
+    """
+     List a page of the current user's address book, paginated by keyset on the address
+     pk like /users_all.
+     
+     Args:
+     	 db: SQLAlchemy session to use
+     	 User: The current user, with their profile
+     	 limit: Page size, capped at ADDRESSES_PAGE_MAX
+     	 cursor: Opaque cursor from a previous page's X-Next-Cursor header
+     
+     Returns: 
+     	 A data list of the addresses' fields. The X-Next-Cursor header is set when a
+       further page exists.
+    """
+    if not User or not User.profile:
+        raise HTTPException(detail="Profile not found", status_code=status.HTTP_404_NOT_FOUND)
+    try:
+        after_pk = int(decode_cursor(cursor)["pk"]) if cursor else None
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(detail="Invalid cursor", status_code=status.HTTP_400_BAD_REQUEST)
+    addresses: list = await crud.AsyncAddressCRUD.retrieve_Addresses_Page(db, User.profile.pk, limit, after_pk)
+    res = JsonRender(addresses[:limit], status.HTTP_200_OK)
+    if len(addresses) > limit:
+        res.headers["X-Next-Cursor"] = encode_cursor(pk=addresses[limit - 1]["pk"])
+    return res
+
+
+@router.put("/addresses")
+@query_budget(-(-settings.ADDRESSES_UPSERT_MAX // settings.ADDRESSES_UPSERT_CHUNK) + 2)
+async def upsertAddresses(request: schemas.AddressUpserts, db: Session | AsyncSession = Depends(get_session),
+                          User=Depends(getCurrentUserProfileWriter)):
+    """
+     Create or replace many of the current user's addresses at once, e.g. when syncing
+     an address book from a CRM. Each address is keyed by its externalRef: an address
+     with a new externalRef is created and one with a known externalRef is replaced.
+     The batch is written in one transaction, with one dialect-aware upsert per
+     ADDRESSES_UPSERT_CHUNK addresses.
+     
+     Args:
+     	 request: The addresses to upsert, at most ADDRESSES_UPSERT_MAX
+     	 db: SQLAlchemy session to use
+     	 User: The current user, with their profile
+     
+     Returns: 
+     	 A data object with the received count and the upserted count, which leaves out
+       addresses repeating an externalRef of the batch.
+    """
+    if not User or not User.profile:
+        raise HTTPException(detail="Profile not found", status_code=status.HTTP_404_NOT_FOUND)
+    upserted = await crud.AsyncAddressCRUD.upsert_Addresses(db, User.pk, User.profile.pk, request) if request else 0
+    res = OrjsonResponse({"data": {"received": len(request), "upserted": upserted}}, status.HTTP_200_OK)
+    mark_write(res)
+    return res
+
+
+@router.post("/admin/import_users")
+async def importUsers(request: Request, db: Session | AsyncSession = Depends(get_session), admin=Depends(getCurrentAdmin)):
+    """
+     Bulk create users from a JSON-lines body of UserCreate records, or a CSV body with an
+     email,username,psw,re_psw header when the Content-Type is text/csv. The body is read
+     as a stream and handled IMPORT_CHUNK_SIZE records at a time: each chunk is validated,
+     its passwords hashed in parallel, and its users & profiles inserted in one transaction,
+     so memory stays bounded whatever the size of the import.
+     
+     Args:
+     	 request: The request whose body holds the records
+     	 db: SQLAlchemy session to use
+     	 admin: The admin user performing the import
+     
+     Returns: 
+     	 A data object with the received, created and failed counts, and the line number &
+       reason of each failed record, capped at IMPORT_MAX_ERRORS.
+    """
+    report = {"received": 0, "created": 0, "failed": 0, "errors": [], "errorsTruncated": False}
+    records = iter_records(request.stream(), request.headers.get("content-type", ""))
+    async for chunk in chunked(records, settings.IMPORT_CHUNK_SIZE):
+        rows, errors = await run_in_threadpool(crud.UserCRUD.prepare_Import, chunk)
+        created, conflicts = await crud.AsyncUserCRUD.import_Users(db, rows)
+        errors += conflicts
+        report["received"] += len(chunk)
+        report["created"] += created
+        report["failed"] += len(errors)
+        room = settings.IMPORT_MAX_ERRORS - len(report["errors"])
+        report["errors"] += errors[:max(room, 0)]
+        report["errorsTruncated"] |= len(errors) > room
+    report["errors"].sort(key=lambda error: error["line"])
+    return OrjsonResponse({"data": report}, status.HTTP_200_OK)
@@ -1,30 +1,60 @@
+import hashlib
 import jwt
+import time
 from fastapi import HTTPException, status
 from uuid import uuid4
 
-from datetime import timedelta, datetime
+from datetime import timedelta, datetime, timezone
 
-from pydantic import EmailStr
-from sqlalchemy.orm import Session
+from pydantic import EmailStr, ValidationError
+from sqlalchemy import bindparam, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, object_session
+from starlette.concurrency import run_in_threadpool
+from sql_app import database
 from sql_app.database import get_db
 
 from auth import schemas, models
 
-from core import logging
-from core.hash import Hash
+from core import logging, timing
+from core.cache import TTLCache
+from core.hash import digest, hasher
+from core.revocation import RevocationStore
 from core.config import settings
 from core.logging import ServerINFO
+from core.write_behind import WriteBehindBuffer
 
 NAMESPACE: str = "Auth CRUD"
 
 # Model variables
 UserModel = models.User
 ProfileModel = models.Profile
+AddressModel = models.Address
+RevokedTokenModel = models.RevokedToken
 
 # Schema variables
 ProfileSchema = schemas.ProfileBase
 TokenSchema = schemas.Token
 
+# Relationship loading strategies, picked per query rather than fixed on the models.
+#   identity: the users row only, for auth checks.
+#   profile:  the user and its profile in one joined query.
+#   full:     the whole User -> Profile -> Address -> CountryCode graph.
+#   list:     pages of users, an alias of full.
+UserLoaders: dict = {
+    "identity": (),
+    "profile": (joinedload(UserModel.profile),),
+    "full": (joinedload(UserModel.profile).selectinload(ProfileModel.addresses).joinedload(AddressModel.country),),
+}
+UserLoaders["list"] = UserLoaders["full"]
+
+# Verified JWT payloads keyed by the raw token; entries never outlive the token's exp.
+TokenCache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL)
+
+# Resolved users keyed by the token's UUID, aliased by username and pk for invalidation.
+UserCache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
 class AuthHandler():
     Secret = settings.AUTH_SECRET
     Pepper = settings.PEPPER
@@ -43,12 +73,26 @@ class AuthHandler():
          	 The hashed password as a bytestring with the length of 256 bytes in 
              the range 0 to 255. Note that the password is encrypted.
         """
-        return Hash.encode(key=psw, pepper=self.Pepper)
+        return digest(psw, self.Pepper)
+
+
+    def hash_for_storage(self, psw: str) -> str:
+        """
+         The value stored in User.password: the peppered hash of get_password_hash(psw),
+         which is the format verify_password checks against.
+         
+         Args:
+         	 psw: The plain password.
+         
+         Returns: 
+         	 The hash to store for the password.
+        """
+        return hasher.storage_hash(psw)
 
 
     def verify_password(self, psw, hashed_psw) -> bool:
         """
-         Verifies a password. This is a wrapper around Hash.verify
+         Verifies a password. This is a wrapper around core.hash.hasher
          that we have a key and a encoded key.
          
          Args:
@@ -59,8 +103,14 @@ class AuthHandler():
          	 True if the password is correct False otherwise. Note 
              that this does not check the validity of the password.
         """
-        pswKeyHash = self.get_password_hash(psw)
-        return Hash.verify(key=pswKeyHash, encoded_key=hashed_psw, pepper=self.Pepper)
+        return hasher.verify(psw, hashed_psw)
+
+
+    async def verify_password_async(self, psw, hashed_psw) -> bool:
+        """
+         verify_password run on the hasher's pool, so the event loop stays free.
+        """
+        return await hasher.verify_async(psw, hashed_psw)
 
 
     def encode_token(self, uuid: str, username: str) -> str:
@@ -81,25 +131,38 @@ class AuthHandler():
             "exp": datetime.utcnow() + timedelta(days=100, hours=0, minutes=0),
             "iat": datetime.utcnow(),
             "uuid": uuid,
-            "username": username}
+            "username": username,
+            # Identifies the token within the RevokedTokens store.
+            "jti": uuid4().hex}
         return jwt.encode(
             payload,
             self.Secret,
             algorithm="HS256")
 
 
-    def decode_token(self, token) -> TokenSchema:
+    def decode_token(self, token, use_cache: bool = True) -> TokenSchema:
         """
          Decodes a JWT token. This is a wrapper around jwt.decode 
          to handle exceptions that are raised in the process.
+         Verified payloads are memoized within the TokenCache until
+         the token's exp, so a repeated token skips the signature check.
          
          Args:
          	 token: The JWT token to decode
+         	 use_cache: Whether to consult and fill the TokenCache
          
          Returns: 
          	 The payload of the JWT token as a TokenSchema or 
              raises HTTPException if the token is invalid.
         """
+        with timing.phase("auth"):
+            return self._decode_token(token, use_cache)
+
+
+    def _decode_token(self, token, use_cache: bool) -> TokenSchema:
+        payload = TokenCache.get(token) if use_cache else None
+        if payload is not None:
+            return payload
         try:
             payload = jwt.decode(
                 token,
@@ -111,9 +174,34 @@ class AuthHandler():
         except jwt.InvalidTokenError as e:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid token')
+        # Cache only for the remainder of the token's lifetime.
+        remaining = payload.get("exp", 0) - time.time()
+        if use_cache and remaining > 0:
+            TokenCache.set(token, payload, ttl=min(TokenCache.ttl, remaining))
         return payload
 
 
+    def token_id(self, token: str, payload: dict) -> str:
+        """
+         The id a token is revoked under: its jti claim, or the SHA-256 of the
+         token itself for tokens issued before the claim was added.
+        """
+        return payload.get("jti") or hashlib.sha256(str(token).encode()).hexdigest()
+
+
+    def is_revoked(self, token: str) -> bool:
+        """
+         Whether the token was revoked, e.g. by a logout. Checked against the
+         in-memory RevokedTokens store, so it never costs a query. Tokens that
+         don't decode are left for decode_token to reject.
+        """
+        try:
+            payload = self.decode_token(token)
+        except HTTPException:
+            return False
+        return self.token_id(token, payload) in RevokedTokens
+
+
     def grant_access(self, token: str, uuid: str):
         """
          Check if token is valid. This is used to verify that 
@@ -136,38 +224,81 @@ class AuthHandler():
 
 class UserCRUD():
 
+    def new_User(request: schemas.UserCreate, password: str = None) -> UserModel:
+        """
+         Build a transient UserModel instance from the registration request,
+         generating the user's UUID and hashing the password.
+
+         Args:
+         	 request: request containing user details to be created
+         	 password: the already computed storage hash, hashed here when omitted
+
+         Returns: 
+         	 The UserModel instance, not yet added to any session.
+        """
+        _dict: dict = request.dict()
+        return UserModel(email=_dict.get("email"), username=_dict.get("username"),
+                         password=password or AuthHandler().hash_for_storage(_dict.get("re_psw")), UUID=f"user_{uuid4()}",
+                         verified=_dict.get("verified"), isAdmin=_dict.get("isAdmin"))
+
+
     def create_User(db: Session, request: schemas.UserCreate) -> UserModel:
         """
          function to create a user & a linked user profile instance in 
-         the database and return the UserModel instance.
+         the database and return the UserModel instance. Both rows are
+         inserted within a single transaction, so a failure leaves no
+         partially created user behind.
          
          Args:
          	 db: db connection to be used to perform database operations
          	 request: request containing user details to be created and linked
          
          Returns: 
-         	 user instance of the created user or None if creation 
-           failed for some reason ( such as not having a password ).
+         	 user instance of the created user, or raises IntegrityError when the
+           email or username is already in use.
         """
 
-        _dict: dict = request.dict()
-        _dict["uuid"] = f"user_{uuid4()}"
-        _dict["psw"] = AuthHandler().get_password_hash(psw=_dict.get("re_psw"))
-        _dict.pop("re_psw", None)
-        _user: UserModel = UserModel(email=_dict.get("email"), username=_dict.get("username"),
-                                     password=Hash.encode(_dict.get("psw"), settings.PEPPER), UUID=_dict.get("uuid"),
-                                     verified=_dict.get("verified"), isAdmin=_dict.get("isAdmin"))
-        # adding User & User's Profile to db and then refreshing the _user instance with the updated information
+        _user: UserModel = UserCRUD.new_User(request)
+        _user.profile = models.Profile()
+        # adding User & User's Profile to db in one flush & commit
         db.add(_user)
-        db.commit()
-        db.refresh(_user)
-        _profile = models.Profile(user_pk=_user.pk)
-        db.add(_profile)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise
         return _user
 
 
-    def retrieve_User(db: Session, username: str = None, email: EmailStr = None) -> UserModel:
+    def registration_Conflict_Query(email: EmailStr, username: str):
+        """
+         One probe for both unique registration fields: the email & username
+         of any user already holding either of them.
+        """
+        return select(UserModel.email, UserModel.username).where(
+            or_(UserModel.email == email, UserModel.username == username)).limit(2)
+
+
+    def registration_Conflicts(db: Session, email: EmailStr, username: str) -> list:
+        """
+         Users already holding the email or the username being registered.
+
+         Returns: 
+         	 A list of (email, username) rows, empty when both are free.
+        """
+        return db.execute(UserCRUD.registration_Conflict_Query(email, username)).all()
+
+
+    def retrieve_User_Query(username: str = None, email: EmailStr = None, load: str = "full"):
+        """
+         Build the select statement for a single user by username or email,
+         with the relationships eagerly loaded according to UserLoaders[load].
+        """
+        query = select(UserModel).options(*UserLoaders[load])
+        return query.filter(UserModel.username == username) if (username) else query.filter(UserModel.email == email)
+
+
+    def retrieve_User(db: Session, username: str = None, email: EmailStr = None, load: str = "full") -> UserModel:
         """
          Retrieve a user from the database. This is used to retrieve users that 
          have been logged in via email or username.
@@ -176,21 +307,170 @@ class UserCRUD():
          	 db: The database to query.
          	 username: The username of the user to retrieve. If None all users are retrieved.
          	 email: The email of the user to retrieve. If None all users are retrieved.
+         	 load: The UserLoaders strategy; "identity" skips every relationship.
          
          Returns: 
          	 The user or None if not found. Note that the return value is a 
              scalar but may be different from the value returned.
         """
-        _retrieve_user = db.query(UserModel).filter(
-            UserModel.username == username).scalar() if (username) else db.query(
-            UserModel).filter(UserModel.email == email).scalar() if (email) else None
-        return _retrieve_user
+        if not (username or email):
+            return None
+        result = db.execute(UserCRUD.retrieve_User_Query(username, email, load))
+        return result.unique().scalar_one_or_none()
+
+
+    def retrieve_All_Users(db: Session) -> list[UserModel]:
+        """
+         Retrieve every user from the database.
+
+         Args:
+         	 db: The database to query.
+
+         Returns: 
+         	 A list of all the UserModel instances within the database.
+        """
+        return db.query(UserModel).options(*UserLoaders["list"]).all()
+
+
+    # Columns that may be requested through a users page projection.
+    PAGE_FIELDS: tuple = tuple(
+        column.key for column in UserModel.__table__.columns if column.key != "password")
+
+
+    def users_Page_Query(limit: int, after_pk: int = None, fields: list[str] = None):
+        """
+         Build the keyset query for one page of users ordered by pk. One row more
+         than limit is selected so the caller can tell whether a next page exists.
+
+         Args:
+         	 limit: The page size.
+         	 after_pk: The pk of the last user of the previous page, if any.
+         	 fields: Column names to project; the full UserModel when None.
+
+         Returns: 
+         	 The select statement, or raises ValueError on an unknown field.
+        """
+        if fields:
+            unknown = [field for field in fields if field not in UserCRUD.PAGE_FIELDS]
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+            query = select(*[getattr(UserModel, field) for field in fields])
+        else:
+            query = select(UserModel).options(*UserLoaders["list"])
+        if after_pk is not None:
+            query = query.where(UserModel.pk > after_pk)
+        return query.order_by(UserModel.pk).limit(limit + 1)
+
+
+    def users_Page_Rows(result, fields: list[str] = None) -> list:
+        if fields:
+            return [dict(row._mapping) for row in result]
+        # Whole users keep their loaded graph for orjson to render, but never the password hash.
+        return [{key: value for key, value in user.__dict__.items() if key != "password" and not key.startswith("_sa")}
+                for user in result.unique().scalars().all()]
+
+
+    def retrieve_Users_Page(db: Session, limit: int, after_pk: int = None, fields: list[str] = None) -> list:
+        """
+         Retrieve one keyset page of users, see users_Page_Query.
+
+         Returns: 
+         	 Up to limit + 1 dicts of the users' loaded attributes but the password, or
+           of the projected fields.
+        """
+        result = db.execute(UserCRUD.users_Page_Query(limit, after_pk, fields))
+        return UserCRUD.users_Page_Rows(result, fields)
+
+
+    def users_By_UUID_Queries(UUIDs: list[str], fields: list[str] = None) -> list:
+        """
+         Build the queries resolving a batch of users by UUID: one IN query per
+         USERS_LOOKUP_CHUNK UUIDs, each projecting only the users columns asked for.
+
+         Args:
+         	 UUIDs: The UUIDs to look up, without duplicates.
+         	 fields: Column names to project; every PAGE_FIELDS column when None.
+
+         Returns: 
+         	 The select statements, or raises ValueError on an unknown field.
+        """
+        fields = fields or list(UserCRUD.PAGE_FIELDS)
+        unknown = [field for field in fields if field not in UserCRUD.PAGE_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        columns = [getattr(UserModel, field) for field in fields if field != "UUID"]
+        size = settings.USERS_LOOKUP_CHUNK
+        return [select(UserModel.UUID, *columns).where(UserModel.UUID.in_(UUIDs[start:start + size]))
+                for start in range(0, len(UUIDs), size)]
+
+
+    def users_By_UUID_Rows(rows, fields: list[str] = None) -> dict:
+        # Keyed by UUID, which is only repeated in the values when it was asked for.
+        keep_UUID = not fields or "UUID" in fields
+        users = {}
+        for row in rows:
+            user = dict(row._mapping)
+            users[user["UUID"] if keep_UUID else user.pop("UUID")] = user
+        return users
+
+
+    def retrieve_Users_By_UUID(db: Session, UUIDs: list[str], fields: list[str] = None) -> dict:
+        """
+         Resolve a batch of users by UUID, see users_By_UUID_Queries. The database
+         work grows with the number of chunks, not of users.
+
+         Returns: 
+         	 A dict of the found users' projected fields keyed by their UUID.
+        """
+        rows = [row for query in UserCRUD.users_By_UUID_Queries(UUIDs, fields) for row in db.execute(query)]
+        return UserCRUD.users_By_UUID_Rows(rows, fields)
+
+
+    def bump_Version_Query(pk: int):
+        """
+         Increment a user's version, which the ETags of its representations are built from.
+         lastLogin is set to itself so its onupdate doesn't fire on writes that aren't logins.
+        """
+        return update(UserModel).where(UserModel.pk == pk).values(
+            version=UserModel.version + 1, lastLogin=UserModel.lastLogin).execution_options(synchronize_session=False)
+
+
+    def cache_User(uuid: str, user: UserModel, load: str = "full") -> None:
+        """
+         Store a resolved user within the UserCache under the token's UUID and
+         the loading strategy it was retrieved with. The user & its loaded
+         relationships are detached from the request's session first, so a later
+         commit within it can't expire the cached copy.
+        """
+        session = object_session(user)
+        if session is not None:
+            profile = user.__dict__.get("profile")
+            addresses = profile.__dict__.get("addresses") or [] if profile is not None else []
+            countries = [address.__dict__.get("country") for address in addresses]
+            for instance in (user, profile, *addresses, *countries):
+                if instance is not None and instance in session:
+                    session.expunge(instance)
+        UserCache.set((uuid, load), user, aliases=(("username", user.username), ("pk", user.pk)))
+
+
+    def invalidate_User(username: str = None, pk: int = None) -> None:
+        """
+         Drop a cached user after a write, so getCurrentUser reloads it. Called once the
+         write is committed: dropped earlier, a concurrent request could reload and cache
+         the row as it was before the write.
+        """
+        if username:
+            UserCache.invalidate(("username", username))
+        if pk:
+            UserCache.invalidate(("pk", pk))
 
 
     def lastLogin(db: Session, username: str) -> bool:
         """
          Update the lastLogin field of a user. This is 
-         used to determine when was the user last logged in. 
+         used to determine when was the user last logged in. With
+         LAST_LOGIN_WRITE_BEHIND the timestamp is buffered and written
+         in a later batch by LoginBuffer instead.
          
          Args:
          	 db: database connection to use for database operations
@@ -199,18 +479,134 @@ class UserCRUD():
          Returns: 
          	 True if successful else False if failed.
         """
+        if settings.LAST_LOGIN_WRITE_BEHIND:
+            LoginBuffer.record(username, datetime.now())
+            return True
         updateUserData = db.query(UserModel).filter(
             UserModel.username == username).update({
-                "lastLogin": datetime.now()})
+                "lastLogin": datetime.now(), "version": UserModel.version + 1})
         # If updateUserData is not set to true the user data is not updated.
         if not updateUserData:
             return False
         db.commit()
+        # Dropped once committed, so a concurrent load can't cache the previous row.
+        UserCRUD.invalidate_User(username=username)
         return True
 
+
+    def flush_Last_Logins(batch: dict) -> None:
+        """
+         Write buffered login timestamps with one executemany UPDATE in a
+         single transaction, then drop the affected users from UserCache.
+         
+         Args:
+         	 batch: mapping of username to its latest login datetime
+        """
+        statement = UserModel.__table__.update().where(
+            UserModel.username == bindparam("b_username")).values(
+                lastLogin=bindparam("b_lastLogin"), version=UserModel.__table__.c.version + 1)
+        with database.SessionCloud() as db:
+            db.execute(statement, [
+                {"b_username": username, "b_lastLogin": loggedIn} for username, loggedIn in batch.items()])
+            db.commit()
+        for username in batch:
+            UserCRUD.invalidate_User(username=username)
+
+
+    def prepare_Import(records: list) -> tuple[list, list]:
+        """
+         Validate a chunk of bulk import records against UserCreate and hash the
+         passwords of the valid ones in parallel on the hasher's pool. CPU only,
+         no database work is done here.
+         
+         Args:
+         	 records: list of (line number, record dict or parse error) pairs
+         
+         Returns: 
+         	 A list of (line number, users row) pairs ready for import_Users and a
+           list of {"line", "error"} dicts for the rejected records.
+        """
+        valid, errors = [], []
+        emails, usernames = set(), set()
+        for line, record in records:
+            if isinstance(record, Exception):
+                errors.append({"line": line, "error": str(record)})
+                continue
+            try:
+                user = schemas.UserCreate(**record)
+            except (ValidationError, TypeError) as exc:
+                errors.append({"line": line, "error": str(exc).replace("\n", " ")})
+                continue
+            if user.psw != user.re_psw:
+                errors.append({"line": line, "error": "Passwords don't match"})
+            elif user.email in emails or user.username in usernames:
+                errors.append({"line": line, "error": "Duplicate email or username within the import"})
+            else:
+                emails.add(user.email)
+                usernames.add(user.username)
+                valid.append((line, user))
+        hashes = hasher.storage_hash_many([user.re_psw for _, user in valid])
+        return [(line, {"UUID": f"user_{uuid4()}", "email": user.email, "username": user.username,
+                        "password": password, "verified": False, "isAdmin": None})
+                for (line, user), password in zip(valid, hashes)], errors
+
+
+    def import_Users(db: Session, rows: list) -> tuple[int, list]:
+        """
+         Insert a prepared chunk of users & their profiles with one executemany
+         INSERT each, in a single transaction. Rows whose email or username is
+         already taken are rejected up front with one probe. Should a concurrent
+         registration still collide, the chunk falls back to row by row inserts.
+         
+         Args:
+         	 db: database connection to use for database operations
+         	 rows: list of (line number, users row) pairs from prepare_Import
+         
+         Returns: 
+         	 The number of users created and a list of {"line", "error"} dicts.
+        """
+        if not rows:
+            return 0, []
+        taken = db.execute(select(UserModel.email, UserModel.username).where(or_(
+            UserModel.email.in_([row["email"] for _, row in rows]),
+            UserModel.username.in_([row["username"] for _, row in rows])))).all()
+        emails = {email for email, _ in taken}
+        usernames = {username for _, username in taken}
+        errors = [{"line": line, "error": "Email or Username is already in use"}
+                  for line, row in rows if row["email"] in emails or row["username"] in usernames]
+        rows = [(line, row) for line, row in rows if row["email"] not in emails and row["username"] not in usernames]
+        if not rows:
+            return 0, errors
+        try:
+            db.execute(insert(UserModel.__table__), [row for _, row in rows])
+            pks = db.execute(select(UserModel.pk).where(
+                UserModel.UUID.in_([row["UUID"] for _, row in rows]))).scalars().all()
+            db.execute(insert(ProfileModel.__table__), [{"user_pk": pk} for pk in pks])
+            db.commit()
+            return len(rows), errors
+        except IntegrityError:
+            db.rollback()
+        created = 0
+        for line, row in rows:
+            try:
+                pk = db.execute(insert(UserModel.__table__), row).inserted_primary_key[0]
+                db.execute(insert(ProfileModel.__table__), {"user_pk": pk})
+                db.commit()
+                created += 1
+            except IntegrityError:
+                db.rollback()
+                errors.append({"line": line, "error": "Email or Username is already in use"})
+        return created, errors
+
+
+# Login timestamps waiting to be written by UserCRUD.flush_Last_Logins, see LAST_LOGIN_WRITE_BEHIND.
+LoginBuffer = WriteBehindBuffer(
+    UserCRUD.flush_Last_Logins, max_batch=settings.LAST_LOGIN_BATCH_SIZE, interval=settings.LAST_LOGIN_FLUSH_INTERVAL)
+
+
 class ProfileCRUD():
     
-    def patch_profile(db: Session, request: ProfileSchema, identifier: int | str) -> ProfileSchema:
+    def patch_profile(db: Session, request: ProfileSchema, identifier: int | str) -> ProfileModel:
         """
         Updates the profile with the given identifier with the data from the request object.
 
@@ -220,7 +616,7 @@ class ProfileCRUD():
             identifier: The identifier of the profile to update.
 
         Returns:
-            The updated ProfileSchema object.
+            The updated, refreshed Profile, for schemas.ProfilePatched to render.
         """
 
         # Check the permissions of the user who is calling the function.
@@ -236,10 +632,357 @@ class ProfileCRUD():
         # Refresh the profile in the database.
         # db.refresh(profile)
 
-        # Commit the changes to the database.
+        # Bump the user's version so ETags of its representations change.
+        db.execute(UserCRUD.bump_Version_Query(identifier))
+        # Commit the changes to the database, then drop the cached user so it's reloaded.
         db.commit()
+        UserCRUD.invalidate_User(pk=identifier)
         
         db.refresh(profile)
 
-        # Return the updated ProfileSchema object.
-        return ProfileSchema(**profile.dict())
+        # Return the updated Profile; the route renders it without re-validating it.
+        return profile
+
+
+class AddressCRUD():
+
+    # Columns of an address_book row, and those an upsert replaces on conflict.
+    FIELDS: tuple = tuple(column.key for column in AddressModel.__table__.columns)
+    UPSERT_FIELDS: tuple = tuple(field for field in FIELDS if field not in ("pk", "profile_pk", "externalRef"))
+
+
+    def addresses_Page_Query(profile_pk: int, limit: int, after_pk: int = None):
+        """
+         Build the keyset query for one page of a profile's addresses ordered by pk,
+         selecting one row more than limit, like UserCRUD.users_Page_Query.
+        """
+        query = select(*[getattr(AddressModel, field) for field in AddressCRUD.FIELDS]).where(
+            AddressModel.profile_pk == profile_pk)
+        if after_pk is not None:
+            query = query.where(AddressModel.pk > after_pk)
+        return query.order_by(AddressModel.pk).limit(limit + 1)
+
+
+    def retrieve_Addresses_Page(db: Session, profile_pk: int, limit: int, after_pk: int = None) -> list:
+        """
+         Retrieve one keyset page of a profile's addresses, see addresses_Page_Query.
+
+         Returns: 
+         	 Up to limit + 1 dicts of the addresses' columns.
+        """
+        return [dict(row._mapping) for row in db.execute(AddressCRUD.addresses_Page_Query(profile_pk, limit, after_pk))]
+
+
+    def upsert_Query(dialect: str):
+        """
+         Build the dialect's upsert of address_book rows keyed by (profile_pk, externalRef):
+         INSERT .. ON DUPLICATE KEY UPDATE on MySQL, INSERT .. ON CONFLICT DO UPDATE on
+         SQLite & PostgreSQL. It is executed with a list of rows, as one executemany.
+
+         Args:
+         	 dialect: The name of the session's dialect, e.g. "mysql".
+
+         Returns: 
+         	 The statement, or raises ValueError for a dialect without upserts.
+        """
+        table = AddressModel.__table__
+        if dialect == "mysql":
+            from sqlalchemy.dialects.mysql import insert as mysql_insert
+            statement = mysql_insert(table)
+            return statement.on_duplicate_key_update(
+                {field: statement.inserted[field] for field in AddressCRUD.UPSERT_FIELDS})
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            statement = dialect_insert(table)
+            return statement.on_conflict_do_update(
+                index_elements=["profile_pk", "externalRef"],
+                set_={field: statement.excluded[field] for field in AddressCRUD.UPSERT_FIELDS})
+        raise ValueError(f"Address upserts aren't supported on {dialect}")
+
+
+    def upsert_Rows(profile_pk: int, addresses: list) -> list:
+        """
+         The address_book rows of a batch of AddressUpsert records for a profile. A later
+         record with the same externalRef replaces an earlier one, as a row can't be
+         upserted twice by one statement.
+        """
+        rows = {}
+        for address in addresses:
+            rows[address.externalRef] = {"profile_pk": profile_pk, **address.dict()}
+        return list(rows.values())
+
+
+    def upsert_Addresses(db: Session, user_pk: int, profile_pk: int, addresses: list) -> int:
+        """
+         Create or replace a batch of a profile's addresses by externalRef in one
+         transaction, with one upsert per ADDRESSES_UPSERT_CHUNK rows rather than an
+         ORM add per address. The user's version is bumped, as its full graph changed,
+         leaving lastLogin as it is, and the cached user is dropped once committed.
+
+         Args:
+         	 db: database session to write with
+         	 user_pk: the pk of the profile's user
+         	 profile_pk: the pk of the profile owning the addresses
+         	 addresses: list of AddressUpsert records
+
+         Returns: 
+         	 The number of addresses upserted, after dropping repeated externalRefs.
+        """
+        rows = AddressCRUD.upsert_Rows(profile_pk, addresses)
+        statement = AddressCRUD.upsert_Query(db.bind.dialect.name)
+        size = settings.ADDRESSES_UPSERT_CHUNK
+        try:
+            for start in range(0, len(rows), size):
+                db.execute(statement, rows[start:start + size])
+            db.execute(UserCRUD.bump_Version_Query(user_pk))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        UserCRUD.invalidate_User(pk=user_pk)
+        return len(rows)
+
+
+class TokenCRUD():
+
+    def revoke_Query(token: str):
+        """
+         The INSERT recording the revocation of a verified token, and its id & exp.
+        """
+        handler = AuthHandler()
+        payload = handler.decode_token(token)
+        token_id = handler.token_id(token, payload)
+        statement = insert(RevokedTokenModel).values(
+            jti=token_id, expires=datetime.utcfromtimestamp(payload["exp"]))
+        return statement, token_id, payload["exp"]
+
+
+    def revoke_Token(db: Session, token: str) -> None:
+        """
+         Revoke a token until it expires: the revocation is persisted in revoked_tokens,
+         for the other workers & restarts, and applied to RevokedTokens right away.
+         
+         Args:
+         	 db: database session to record the revocation with
+         	 token: the raw JWT to revoke
+        """
+        statement, token_id, expires = TokenCRUD.revoke_Query(token)
+        try:
+            db.execute(statement)
+            db.commit()
+        # Already revoked, e.g. by a concurrent logout with the same token.
+        except IntegrityError:
+            db.rollback()
+        TokenCRUD.apply_Revocation(token, token_id, expires)
+
+
+    def apply_Revocation(token: str, token_id: str, expires: float) -> None:
+        RevokedTokens.add(token_id, expires)
+        TokenCache.invalidate(token)
+
+
+    def load_Revocations(since: datetime = None) -> list:
+        """
+         The unexpired revocations recorded at or after since, every one of them when
+         since is None, for RevokedTokens.refresh.
+         
+         Returns: 
+         	 A list of (revokedAt, token id, expires timestamp) tuples.
+        """
+        statement = select(RevokedTokenModel.revokedAt, RevokedTokenModel.jti, RevokedTokenModel.expires).where(
+            RevokedTokenModel.expires > datetime.utcnow())
+        if since is not None:
+            statement = statement.where(RevokedTokenModel.revokedAt >= since)
+        with database.SessionCloud() as db:
+            rows = db.execute(statement).all()
+        return [(revokedAt, jti, expires.replace(tzinfo=timezone.utc).timestamp()) for revokedAt, jti, expires in rows]
+
+
+# Ids of revoked tokens, synced from revoked_tokens every REVOCATION_SYNC_INTERVAL seconds.
+RevokedTokens = RevocationStore(TokenCRUD.load_Revocations, interval=settings.REVOCATION_SYNC_INTERVAL,
+                                overlap=settings.REVOCATION_SYNC_OVERLAP)
+
+
+class AsyncUserCRUD():
+    """
+    asyncio counterparts of UserCRUD. An AsyncSession is driven natively, while
+    a synchronous Session is handed to the threadpool so a database round trip
+    never stalls the event loop.
+    """
+
+    async def create_User(db: Session | AsyncSession, request: schemas.UserCreate) -> UserModel:
+        """
+         Async version of UserCRUD.create_User.
+        """
+        if not isinstance(db, AsyncSession):
+            return await run_in_threadpool(UserCRUD.create_User, db, request)
+        _user: UserModel = UserCRUD.new_User(request, await hasher.storage_hash_async(request.re_psw))
+        _user.profile = models.Profile()
+        db.add(_user)
+        try:
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            raise
+        return _user
+
+
+    async def registration_Conflicts(db: Session | AsyncSession, email: EmailStr, username: str) -> list:
+        """
+         Async version of UserCRUD.registration_Conflicts.
+        """
+        if not isinstance(db, AsyncSession):
+            return await run_in_threadpool(UserCRUD.registration_Conflicts, db, email, username)
+        result = await db.execute(UserCRUD.registration_Conflict_Query(email, username))
+        return result.all()
+
+
+    async def retrieve_User(db: Session | AsyncSession, username: str = None, email: EmailStr = None, load: str = "full") -> UserModel:
+        """
+         Async version of UserCRUD.retrieve_User.
+        """
+        if not isinstance(db, AsyncSession):
+            return await run_in_threadpool(UserCRUD.retrieve_User, db, username, email, load)
+        if not (username or email):
+            return None
+        result = await db.execute(UserCRUD.retrieve_User_Query(username, email, load))
+        return result.unique().scalar_one_or_none()
+
+
+    async def retrieve_All_Users(db: Session | AsyncSession) -> list[UserModel]:
+        """
+         Async version of UserCRUD.retrieve_All_Users.
+        """
+        if not isinstance(db, AsyncSession):
+            return await run_in_threadpool(UserCRUD.retrieve_All_Users, db)
+        result = await db.execute(select(UserModel).options(*UserLoaders["list"]))
+        return result.unique().scalars().all()
+
+
+    async def retrieve_Users_Page(db: Session | AsyncSession, limit: int, after_pk: int = None, fields: list[str] = None) -> list:
+        """
+         Async version of UserCRUD.retrieve_Users_Page.
+        """
+        if not isinstance(db, AsyncSession):
+            return await run_in_threadpool(UserCRUD.retrieve_Users_Page, db, limit, after_pk, fields)
+        result = await db.execute(UserCRUD.users_Page_Query(limit, after_pk, fields))
+        return UserCRUD.users_Page_Rows(result, fields)
+
+
+    async def retrieve_Users_By_UUID(db: Session | AsyncSession, UUIDs: list[str], fields: list[str] = None) -> dict:
+        """
+         Async version of UserCRUD.retrieve_Users_By_UUID.
+        """
+        if not isinstance(db, AsyncSession):
+            return await run_in_threadpool(UserCRUD.retrieve_Users_By_UUID, db, UUIDs, fields)
+        rows = []
+        for query in UserCRUD.users_By_UUID_Queries(UUIDs, fields):
+            rows += (await db.execute(query)).all()
+        return UserCRUD.users_By_UUID_Rows(rows, fields)
+
+
+    async def lastLogin(db: Session | AsyncSession, username: str) -> bool:
+        """
+         Async version of UserCRUD.lastLogin.
+        """
+        # Buffering only touches memory, so it stays on the event loop.
+        if settings.LAST_LOGIN_WRITE_BEHIND:
+            return UserCRUD.lastLogin(db, username)
+        if not isinstance(db, AsyncSession):
+            return await run_in_threadpool(UserCRUD.lastLogin, db, username)
+        updateUserData = await db.execute(update(UserModel).where(
+            UserModel.username == username).values(lastLogin=datetime.now(), version=UserModel.version + 1))
+        # If no rows were matched the user data is not updated.
+        if not updateUserData.rowcount:
+            return False
+        await db.commit()
+        UserCRUD.invalidate_User(username=username)
+        return True
+
+
+    async def import_Users(db: Session | AsyncSession, rows: list) -> tuple[int, list]:
+        """
+         Async version of UserCRUD.import_Users, run through the AsyncSession's
+         run_sync so the same bulk statements are used.
+        """
+        if not isinstance(db, AsyncSession):
+            return await run_in_threadpool(UserCRUD.import_Users, db, rows)
+        return await db.run_sync(UserCRUD.import_Users, rows)
+
+
+class AsyncProfileCRUD():
+    """
+    asyncio counterparts of ProfileCRUD, see AsyncUserCRUD.
+    """
+
+    async def patch_profile(db: Session | AsyncSession, request: ProfileSchema, identifier: int | str) -> ProfileModel:
+        """
+         Async version of ProfileCRUD.patch_profile.
+        """
+        if not isinstance(db, AsyncSession):
+            return await run_in_threadpool(ProfileCRUD.patch_profile, db, request, identifier)
+        result = await db.execute(select(ProfileModel).filter_by(user_pk=identifier))
+        profile = result.unique().scalar_one_or_none()
+
+        # Update the profile with the data from the request object.
+        for key, value in request.dict(exclude_unset=True).items():
+            setattr(profile, key, value)
+
+        await db.execute(UserCRUD.bump_Version_Query(identifier))
+        await db.commit()
+        UserCRUD.invalidate_User(pk=identifier)
+        await db.refresh(profile)
+        return profile
+
+
+class AsyncAddressCRUD():
+
+    async def retrieve_Addresses_Page(db: Session | AsyncSession, profile_pk: int, limit: int, after_pk: int = None) -> list:
+        """
+         Async version of AddressCRUD.retrieve_Addresses_Page.
+        """
+        if not isinstance(db, AsyncSession):
+            return await run_in_threadpool(AddressCRUD.retrieve_Addresses_Page, db, profile_pk, limit, after_pk)
+        result = await db.execute(AddressCRUD.addresses_Page_Query(profile_pk, limit, after_pk))
+        return [dict(row._mapping) for row in result]
+
+
+    async def upsert_Addresses(db: Session | AsyncSession, user_pk: int, profile_pk: int, addresses: list) -> int:
+        """
+         Async version of AddressCRUD.upsert_Addresses.
+        """
+        if not isinstance(db, AsyncSession):
+            return await run_in_threadpool(AddressCRUD.upsert_Addresses, db, user_pk, profile_pk, addresses)
+        rows = AddressCRUD.upsert_Rows(profile_pk, addresses)
+        statement = AddressCRUD.upsert_Query(db.bind.dialect.name)
+        size = settings.ADDRESSES_UPSERT_CHUNK
+        try:
+            for start in range(0, len(rows), size):
+                await db.execute(statement, rows[start:start + size])
+            await db.execute(UserCRUD.bump_Version_Query(user_pk))
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        UserCRUD.invalidate_User(pk=user_pk)
+        return len(rows)
+
+
+class AsyncTokenCRUD():
+
+    async def revoke_Token(db: Session | AsyncSession, token: str) -> None:
+        """
+         Async version of TokenCRUD.revoke_Token.
+        """
+        if not isinstance(db, AsyncSession):
+            return await run_in_threadpool(TokenCRUD.revoke_Token, db, token)
+        statement, token_id, expires = TokenCRUD.revoke_Query(token)
+        try:
+            await db.execute(statement)
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+        TokenCRUD.apply_Revocation(token, token_id, expires)
@@ -1,5 +1,5 @@
 from sqlalchemy import (ForeignKey, Boolean, 
-                        Column, Integer,
+                        Column, Index, Integer,
                         String)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -11,9 +11,9 @@ from sql_app.database import Base
 class User(Base):
     __tablename__ = "users"
 
-    pk = Column(Integer, primary_key=True, index=True, nullable=False)
+    pk = Column(Integer, primary_key=True, nullable=False)
     profile = relationship("Profile", back_populates="user", primaryjoin="User.pk == Profile.user_pk",
-                           passive_deletes=True, uselist=False, lazy="joined")
+                           passive_deletes=True, uselist=False, lazy="select")
     UUID = Column(String(length=41), unique=True, nullable=False)
 
     email = Column(String(length=255), unique=True, index=True, nullable=False)
@@ -27,6 +27,8 @@ class User(Base):
     dateJoined = Column(DateTime(timezone=True),
                         server_default=func.now(), nullable=False)
     lastLogin = Column(DateTime, onupdate=func.now())
+    # Bumped on login & profile patches; the ETag of the user's representations.
+    version = Column(Integer, default=1, server_default="1", nullable=False)
 
     def __repr__(self) -> str:
         return f"{self.username}"
@@ -48,8 +50,8 @@ class User(Base):
 class Profile(Base):
     __tablename__ = "user_profiles"
 
-    pk = Column(Integer, primary_key=True, index=True, nullable=False)
-    user_pk = Column(Integer,ForeignKey("users.pk", ondelete="CASCADE"))
+    pk = Column(Integer, primary_key=True, nullable=False)
+    user_pk = Column(Integer,ForeignKey("users.pk", ondelete="CASCADE"), index=True)
     user = relationship("User", cascade="all,delete",
                         back_populates="profile")
 
@@ -57,12 +59,11 @@ class Profile(Base):
     lastName = Column(String(length=35), index=True)
     addresses = relationship(
         "Address", back_populates="profile", passive_deletes=True,
-        primaryjoin="Profile.pk == Address.profile_pk", lazy="joined", uselist=True)
+        primaryjoin="Profile.pk == Address.profile_pk", lazy="select", uselist=True)
     stripe_Cust_ID = Column(String(length=50), nullable=True)
     One_click_Purchasing = Column(Boolean, default=False)
     
     def dict(self, exclude_none=True):
-        self.__dict__.items().mapping.get("")
         return {
             key: value
             for key, value in self.__dict__.items()
@@ -78,9 +79,13 @@ class Profile(Base):
 
 class Address(Base):
     __tablename__ = "address_book"
-    pk = Column(Integer, primary_key=True, index=True, nullable=False)
+    # Upserts conflict on the profile & external reference; also the index of a profile's addresses.
+    __table_args__ = (Index("ux_address_book_profile_pk_externalRef", "profile_pk", "externalRef", unique=True),)
+    pk = Column(Integer, primary_key=True, nullable=False)
     profile_pk = Column(
         Integer, ForeignKey(Profile.pk, ondelete="CASCADE"))
+    # The address' id within the system it is synced from, e.g. the CRM.
+    externalRef = Column(String(length=64), nullable=True)
     profile = relationship("Profile", cascade="all,delete",
                            back_populates="addresses")
     streetNumber = Column(Integer)
@@ -90,7 +95,7 @@ class Address(Base):
     city = Column(String(length=25))
     state = Column(String(length=25))
     country = relationship("CountryCode", back_populates="address", primaryjoin= "Address.pk == CountryCode.address_pk",
-                           passive_deletes=False, uselist=False, lazy="joined")
+                           passive_deletes=False, uselist=False, lazy="select")
     
     def dict(self, exclude_none=True):
         return {
@@ -107,8 +112,8 @@ class Address(Base):
 
 class CountryCode(Base):
     __tablename__ = "country_code"
-    pk = Column(Integer, primary_key=True, index=True, nullable=False)
-    address_pk = Column(Integer, ForeignKey(Address.pk))
+    pk = Column(Integer, primary_key=True, nullable=False)
+    address_pk = Column(Integer, ForeignKey(Address.pk), index=True)
     address = relationship("Address", back_populates="country")
     alpha3 = Column(String(length=3), unique=True, nullable=False)
     title = Column(String(length=25), unique=True, nullable=False)
@@ -124,3 +129,14 @@ class CountryCode(Base):
         state = self.__dict__.copy()
         del state['_sa_instance_state']
         return state
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+    pk = Column(Integer, primary_key=True, nullable=False)
+    # The token's jti claim, or the SHA-256 of tokens issued without one.
+    jti = Column(String(length=64), unique=True, nullable=False)
+    # The token's exp; rows past it no longer need loading.
+    expires = Column(DateTime, nullable=False)
+    # When the revocation was recorded, by the database's clock; the store syncs by it.
+    revokedAt = Column(DateTime(timezone=True), server_default=func.now(), index=True, nullable=False)
@@ -1,6 +1,9 @@
-from pydantic import BaseModel as Base, EmailStr
+from pydantic import BaseModel as Base, EmailStr, Field, conlist
 from datetime import datetime
 
+from core.config import settings
+from core.serialize import Serializer
+
 class OrmBase(Base):
     class Config:
         orm_mode=True
@@ -8,20 +11,39 @@ class OrmBase(Base):
 
 class CountryCode(OrmBase):
     pk: int | None
-    name: str | None
+    alpha3: str | None
+    title: str | None
 
 
 class AddressBase(OrmBase):
+    pk: int | None
     profile_pk: int
+    externalRef: str | None = None
 
     streetNumber: int | None 
     streetName: str | None = None
     aptNumber: str | None = None
 
-    ZipCode: int | None
+    zipCode: int | None
     city: str | None = None
     state: str | None = None
-    country_Code: CountryCode | None
+    country: CountryCode | None
+
+
+class AddressUpsert(Base):
+    externalRef: str = Field(min_length=1, max_length=64)
+
+    streetNumber: int | None = None
+    streetName: str | None = Field(None, max_length=100)
+    aptNumber: str | None = Field(None, max_length=10)
+
+    zipCode: int | None = None
+    city: str | None = Field(None, max_length=25)
+    state: str | None = Field(None, max_length=25)
+
+
+# The PUT /auth/addresses body, capped before any address is validated.
+AddressUpserts = conlist(AddressUpsert, max_items=settings.ADDRESSES_UPSERT_MAX)
 
 
 class ProfileBase(OrmBase):
@@ -72,9 +94,23 @@ class UserCreate(OrmBase):
     re_psw: str
 
 
+class UsersLookup(Base):
+    # Capped before validation goes any further, duplicates included.
+    UUIDs: list[str] = Field(..., max_items=settings.USERS_LOOKUP_MAX)
+    fields: list[str] | None = None
+
+
 class Token(Base):
     exp: int
     iat: int
     iss: str
     uuid: str
     username: str
+    jti: str | None = None
+
+
+# Precompiled serializers for the response payloads, see core.serialize.Serializer.
+#   UserPublic:     /auth/retrieve_user, a UserBase without isAdmin & password.
+#   ProfilePatched: /auth/patch_profile, a ProfileBase without its keys & Stripe ID.
+UserPublic = Serializer(UserBase, exclude={"isAdmin", "password"})
+ProfilePatched = Serializer(ProfileBase, exclude={"pk", "user_pk", "stripe_Cust_ID"})
@@ -0,0 +1,30 @@
+"""
+Microbenchmark for AuthHandler.decode_token with and without the TokenCache.
+
+    python -m benchmarks.decode_token [iterations]
+"""
+import sys
+import timeit
+
+from auth import crud
+
+NAMESPACE: str = "Benchmarks/Decode Token"
+
+
+def main(iterations: int = 20000):
+    handler = crud.AuthHandler()
+    token = handler.encode_token("user_benchmark", "benchmark")
+    crud.TokenCache.clear()
+
+    uncached = timeit.timeit(lambda: handler.decode_token(token, use_cache=False), number=iterations)
+    handler.decode_token(token)
+    cached = timeit.timeit(lambda: handler.decode_token(token), number=iterations)
+
+    print(f"decode_token x{iterations}")
+    print(f"  without cache: {uncached / iterations * 1e6:8.2f} us/op")
+    print(f"  with cache:    {cached / iterations * 1e6:8.2f} us/op")
+    print(f"  speedup:       {uncached / cached:8.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
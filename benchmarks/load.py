@@ -0,0 +1,205 @@
+"""
+End-to-end load benchmark for the auth service.
+
+The App is started in-process against a throwaway SQLite stand-in and driven
+straight through its ASGI interface, so no server or network is involved.
+Each endpoint is run at the given concurrency and reported with its
+throughput and p50/p95/p99 latency. Results can be stored as a baseline;
+later runs fail (exit code 1) when any endpoint regresses past --threshold.
+Baselines are machine specific; store one on the machine that runs the check.
+
+    python -m benchmarks.load --requests 500 --concurrency 16
+    python -m benchmarks.load --save-baseline
+    python -m benchmarks.load --async-db --baseline benchmarks/baselines_async.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+NAMESPACE: str = "Benchmarks/Load"
+
+BASELINE_PATH: str = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+
+async def asgi_request(app, method: str, path: str, headers: dict = None, json_body=None):
+    """
+     Send a single request through the App's ASGI interface.
+
+     Returns:
+     	 The response status code and its decoded body.
+    """
+    body = json.dumps(json_body).encode() if json_body is not None else b""
+    path, _, query = path.partition("?")
+    raw_headers = [(b"host", b"bench"), (b"content-length", str(len(body)).encode())]
+    if json_body is not None:
+        raw_headers.append((b"content-type", b"application/json"))
+    raw_headers += [(key.lower().encode(), value.encode()) for key, value in (headers or {}).items()]
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+             "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+             "query_string": query.encode(), "headers": raw_headers,
+             "client": ("127.0.0.1", 1), "server": ("bench", 80)}
+    messages = iter([{"type": "http.request", "body": body, "more_body": False}])
+    response: dict = {"status": None, "body": b""}
+
+    async def receive():
+        message = next(messages, None)
+        # Like a live connection, block until the client goes away.
+        if message is None:
+            await asyncio.Event().wait()
+        return message
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return response["status"], response["body"]
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_endpoint(app, requests: list, concurrency: int, expected: tuple) -> dict:
+    """
+     Drive a list of (method, path, headers, json) requests with a fixed number
+     of concurrent workers and summarise their latencies.
+    """
+    latencies: list = []
+    failures: list = []
+    pending = iter(requests)
+
+    async def worker():
+        for method, path, headers, body in pending:
+            start = time.perf_counter()
+            status, content = await asgi_request(app, method, path, headers, body)
+            latencies.append(time.perf_counter() - start)
+            if status not in expected:
+                failures.append((status, content[:200]))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    if failures:
+        raise RuntimeError(f"{len(failures)} unexpected responses, first: {failures[0]}")
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+async def run_suite(requests: int, concurrency: int, seed_users: int) -> dict:
+    # Imported here, once the environment points the App at the SQLite stand-in.
+    import main
+    app = main.app
+
+    status, content = await asgi_request(app, "POST", "/db/migrate")
+    assert status == 201, content
+    password = "benchmark-password"
+
+    def user(name: str) -> dict:
+        return {"email": f"{name}@example.com", "username": name, "psw": password, "re_psw": password}
+
+    for index in range(seed_users):
+        status, content = await asgi_request(app, "POST", "/auth/register", json_body=user(f"seed{index}"))
+        assert status == 201, content
+
+    tokens = []
+    for index in range(min(seed_users, concurrency)):
+        status, content = await asgi_request(app, "POST", "/auth/token",
+                                             json_body={"username": f"seed{index}", "password": password})
+        tokens.append({"Authorization": json.loads(content)["data"]["token"]})
+
+    scenarios = {
+        "register": ([("POST", "/auth/register", None, user(f"load{index}")) for index in range(requests)], (201,)),
+        "token": ([("POST", "/auth/token", None, {"username": f"seed{index % seed_users}", "password": password})
+                   for index in range(requests)], (302,)),
+        "protected": ([("GET", "/auth/protected", tokens[index % len(tokens)], None)
+                       for index in range(requests)], (200,)),
+        "retrieve_user": ([("GET", "/auth/retrieve_user", tokens[index % len(tokens)], None)
+                           for index in range(requests)], (200,)),
+        "users_all": ([("GET", "/auth/users_all?limit=50", None, None) for _ in range(requests)], (200,)),
+    }
+    results = {}
+    try:
+        for name, (scenario, expected) in scenarios.items():
+            results[name] = await run_endpoint(app, scenario, concurrency, expected)
+    finally:
+        await app.router.shutdown()
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+     List the endpoints whose throughput dropped, or whose median latency rose,
+     by more than threshold (a fraction) against the baseline. The tail
+     percentiles are reported but too noisy on a shared machine to gate on.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if result["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{name}: throughput {result['rps']} req/s vs baseline {base['rps']} req/s")
+        if result["p50_ms"] > base["p50_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p50 {result['p50_ms']} ms vs baseline {base['p50_ms']} ms")
+    return regressions
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients")
+    parser.add_argument("--seed-users", type=int, default=50, help="users created before the run")
+    parser.add_argument("--async-db", action="store_true", help="serve through the asyncio AsyncSession")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.5, help="allowed regression, as a fraction")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="auth-bench-")
+    db_path = os.path.join(workdir, "bench.db")
+    os.environ["DB_URL"] = f"sqlite:///{db_path}"
+    os.environ["DB_ASYNC_URL"] = f"sqlite+aiosqlite:///{db_path}"
+    os.environ["DB_ASYNC"] = "true" if args.async_db else "false"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    try:
+        results = asyncio.run(run_suite(args.requests, args.concurrency, args.seed_users))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{'endpoint':15} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for name, result in results.items():
+        print(f"{name:15} {result['rps']:10.1f} {result['p50_ms']:10.3f} {result['p95_ms']:10.3f} {result['p99_ms']:10.3f}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"baseline stored in {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as baseline_file:
+        regressions = compare(results, json.load(baseline_file), args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
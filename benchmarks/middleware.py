@@ -0,0 +1,87 @@
+"""
+Requests per second through the previous pair of @app.middleware("http")
+(BaseHTTPMiddleware) layers against the single pure ASGI TimingMiddleware.
+Requests are driven in-process straight through the ASGI interface.
+
+    python -m benchmarks.middleware [requests]
+"""
+import asyncio
+import sys
+import time
+
+from fastapi import FastAPI, HTTPException, Request
+
+from core.config import OrjsonResponse
+from core.middleware import TimingMiddleware
+
+NAMESPACE: str = "Benchmarks/Middleware"
+
+
+def base_http_app() -> FastAPI:
+    _app = FastAPI(default_response_class=OrjsonResponse)
+
+    @_app.middleware("http")
+    async def add_process_time_header(request: Request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        process_time = time.time() - start_time
+        response.headers["X-Process-Time"] = str(f"{process_time}/s")
+        return response
+
+    @_app.middleware("http")
+    async def errors_handling(request: Request, call_next):
+        try:
+            return await call_next(request)
+        except KeyError:
+            raise HTTPException(status_code=404, detail="The requested resource does not exist")
+        except Exception as exc:
+            raise HTTPException(status_code=500, detail=str(exc))
+
+    return _app
+
+
+def asgi_app() -> FastAPI:
+    _app = FastAPI(default_response_class=OrjsonResponse)
+    _app.add_middleware(TimingMiddleware)
+    return _app
+
+
+async def drive(app, requests: int) -> float:
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": "/", "raw_path": b"/", "root_path": "", "query_string": b"",
+             "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80)}
+
+    def receiver():
+        messages = iter([{"type": "http.request", "body": b"", "more_body": False}])
+
+        async def receive():
+            message = next(messages, None)
+            # Like a live connection, block until the client goes away.
+            if message is None:
+                await asyncio.Event().wait()
+            return message
+        return receive
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receiver(), send)
+    return requests / (time.perf_counter() - start)
+
+
+def main(requests: int = 5000):
+    for name, build in (("BaseHTTPMiddleware x2", base_http_app), ("pure ASGI TimingMiddleware", asgi_app)):
+        app = build()
+
+        @app.get("/")
+        async def basic():
+            return {"hello": "world"}
+
+        asyncio.run(drive(app, 200))
+        print(f"{name:28} {asyncio.run(drive(app, requests)):10.0f} req/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,62 @@
+"""
+Benchmark for the /auth/retrieve_user and /auth/patch_profile payloads: the
+previous response_model path (from_orm validation, response_model_exclude and
+jsonable_encoder, then JsonRender) against the precompiled schemas.UserPublic
+and schemas.ProfilePatched serializers rendered by JsonRender.
+
+    python -m benchmarks.serialize_schemas [rounds]
+"""
+import sys
+import timeit
+
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from auth import schemas
+from benchmarks.serialize_users import build_users
+from core.config import JsonRender
+
+NAMESPACE: str = "Benchmarks/Serialize Schemas"
+
+USER_FIELD = create_response_field(name="UserBase", type_=schemas.UserBase)
+PROFILE_FIELD = create_response_field(name="ProfileBase", type_=schemas.ProfileBase)
+
+
+def response_model_path(field, content, exclude: list) -> JsonRender:
+    # What FastAPI does for a route with response_model & response_model_exclude. The
+    # coroutine never suspends for an async route, so it is driven without an event loop.
+    coroutine = serialize_response(field=field, response_content=content, exclude=exclude)
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return JsonRender(done.value)
+    raise RuntimeError("serialize_response suspended")
+
+
+def run(label: str, previous, compiled, number: int):
+    previous_time = timeit.timeit(previous, number=number) / number
+    compiled_time = timeit.timeit(compiled, number=number) / number
+    print(f"{label}, {number} rounds")
+    print(f"  response_model path:  {previous_time * 1e6:10.2f} us")
+    print(f"  compiled serializer:  {compiled_time * 1e6:10.2f} us")
+    print(f"  speedup:              {previous_time / compiled_time:10.1f}x")
+
+
+def main(rounds: int = 5000):
+    user = build_users(1)[0]
+    profile = user.profile
+    assert JsonRender(schemas.UserPublic(user)).body == \
+        response_model_path(USER_FIELD, user, ["user_profile", "isAdmin", "password"]).body
+
+    run("retrieve_user payload",
+        lambda: response_model_path(USER_FIELD, user, ["user_profile", "isAdmin", "password"]),
+        lambda: JsonRender(schemas.UserPublic(user)), rounds)
+    # The previous patch_profile also rebuilt a ProfileBase from Profile.dict() in the CRUD.
+    run("patch_profile payload",
+        lambda: response_model_path(PROFILE_FIELD, schemas.ProfileBase(**profile.dict()),
+                                    ["pk", "user_pk", "stripe_Cust_ID"]),
+        lambda: JsonRender(schemas.ProfilePatched(profile)), rounds)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,47 @@
+"""
+Benchmark for rendering user payloads: the previous jsonable_encoder + stdlib
+JSONResponse path against the orjson-backed JsonRender.
+
+    python -m benchmarks.serialize_users [rounds]
+"""
+import sys
+import timeit
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder as jEnc
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm.attributes import set_committed_value
+
+from auth import models
+from core.config import JsonRender
+
+NAMESPACE: str = "Benchmarks/Serialize Users"
+
+
+def build_users(count: int) -> list:
+    users = []
+    for pk in range(1, count + 1):
+        user = models.User(pk=pk, UUID=f"user_{pk:036d}", email=f"user{pk}@example.com",
+                           username=f"user{pk}", password="0" * 64, isAdmin=False, verified=True,
+                           dateJoined=datetime(2022, 10, 1), lastLogin=datetime.now())
+        # Set as loaded state, like an eager load, so the Profile.user backref stays unset.
+        set_committed_value(user, "profile", models.Profile(pk=pk, user_pk=pk, firstName="First",
+                                                            lastName="Last", One_click_Purchasing=False))
+        users.append(user)
+    return users
+
+
+def main(rounds: int = 5):
+    for count in (1, 10000):
+        users = build_users(count)
+        number = max(rounds, 20000 // count)
+        stdlib = timeit.timeit(lambda: JSONResponse({"data": jEnc(users)}), number=number) / number
+        orjson = timeit.timeit(lambda: JsonRender(users), number=number) / number
+        print(f"{count} user(s), {number} rounds")
+        print(f"  jsonable_encoder + JSONResponse: {stdlib * 1e3:10.3f} ms")
+        print(f"  orjson JsonRender:               {orjson * 1e3:10.3f} ms")
+        print(f"  speedup:                         {stdlib / orjson:10.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,124 @@
+"""
+Cold-start benchmark for the auth service.
+
+Every run starts a fresh interpreter that imports `main` and serves its first
+request, a page of /auth/users_all, through the ASGI interface against a
+throwaway SQLite stand-in. It reports the time to import the App and the time
+from the start of the import to the first response. Results can be stored as a
+baseline; later runs fail (exit code 1) when a median regresses past
+--threshold. Baselines are machine specific.
+
+    python -m benchmarks.startup --runs 10
+    python -m benchmarks.startup --save-baseline
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+NAMESPACE: str = "Benchmarks/Startup"
+
+BASELINE_PATH: str = os.path.join(os.path.dirname(__file__), "baselines_startup.json")
+ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in the child: time the import of the App and its first response.
+PROBE: str = """
+import asyncio, json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from benchmarks.load import asgi_request
+status, content = asyncio.run(asgi_request(main.app, "GET", "/auth/users_all?limit=1"))
+assert status == 200, content
+print(json.dumps({"import_ms": (imported - start) * 1000, "first_response_ms": (time.perf_counter() - start) * 1000}))
+"""
+
+# Run once in a child before the runs: create the tables and a user to list.
+SETUP: str = """
+import asyncio, main
+from benchmarks.load import asgi_request
+async def setup():
+    await asgi_request(main.app, "POST", "/db/migrate")
+    user = {"email": "startup@example.com", "username": "startup", "psw": "password", "re_psw": "password"}
+    status, content = await asgi_request(main.app, "POST", "/auth/register", json_body=user)
+    assert status == 201, content
+    await main.app.router.shutdown()
+asyncio.run(setup())
+"""
+
+
+def run_child(code: str, env: dict) -> tuple[str, float]:
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "child failed")
+    return result.stdout.strip().splitlines()[-1] if result.stdout.strip() else "", elapsed
+
+
+def run_suite(runs: int, env: dict) -> dict:
+    run_child(SETUP, env)
+    samples = {"import_ms": [], "first_response_ms": [], "process_ms": []}
+    for _ in range(runs):
+        output, elapsed = run_child(PROBE, env)
+        timings = json.loads(output)
+        samples["import_ms"].append(timings["import_ms"])
+        samples["first_response_ms"].append(timings["first_response_ms"])
+        samples["process_ms"].append(elapsed)
+    results = {name: round(statistics.median(values), 3) for name, values in samples.items()}
+    results["runs"] = runs
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+     List the median import and first response times that rose by more than
+     threshold (a fraction) against the baseline.
+    """
+    return [f"{name} {results[name]} ms vs baseline {baseline[name]} ms"
+            for name in ("import_ms", "first_response_ms")
+            if name in baseline and results[name] > baseline[name] * (1 + threshold)]
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="fresh interpreters to time")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.5, help="allowed regression, as a fraction")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="auth-startup-")
+    db_path = os.path.join(workdir, "startup.db")
+    env = {**os.environ, "DB_URL": f"sqlite:///{db_path}", "DB_ASYNC_URL": f"sqlite+aiosqlite:///{db_path}",
+           "DB_ASYNC": "false", "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING")}
+    try:
+        results = run_suite(args.runs, env)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{'import ms':>12} {'first resp ms':>14} {'process ms':>12}")
+    print(f"{results['import_ms']:12.1f} {results['first_response_ms']:14.1f} {results['process_ms']:12.1f}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"baseline stored in {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as baseline_file:
+        regressions = compare(results, json.load(baseline_file), args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
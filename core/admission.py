@@ -0,0 +1,134 @@
+import asyncio
+from collections import deque
+
+import orjson
+
+from core import metrics
+from core.config import settings
+
+NAMESPACE: str = "Core Admission"
+
+
+def parse_limits(spec: str) -> dict:
+    """
+    Parse ADMISSION_LIMITS, comma separated "route=concurrency:queue:timeout"
+    entries, into {route: (concurrency, queue, timeout)}. A route is either
+    "METHOD /path", "/path" for every method, or "*" for every other request.
+    E.g. "POST /auth/token=8:32:0.5,*=64:256:1".
+    """
+    limits = {}
+    for entry in (spec or "").split(","):
+        if not entry.strip():
+            continue
+        route, _, values = entry.rpartition("=")
+        concurrency, queue, timeout = values.split(":")
+        limits[route.strip()] = (int(concurrency), int(queue), float(timeout))
+    return limits
+
+
+class Gate():
+    """
+    Admits at most limit requests at once. Further requests wait in a FIFO
+    queue of at most queue entries, for at most timeout seconds; acquire()
+    reports why a request was shed instead of letting the queue grow.
+    """
+    __slots__ = ("route", "limit", "queue", "timeout", "active", "waiters")
+
+    def __init__(self, route: str, limit: int, queue: int, timeout: float):
+        self.route = route
+        self.limit = limit
+        self.queue = queue
+        self.timeout = timeout
+        self.active: int = 0
+        self.waiters: deque = deque()
+
+
+    async def acquire(self) -> str | None:
+        """
+         Take a slot, waiting for one if needed.
+
+         Returns:
+         	 None once admitted, else the reason the request is shed:
+           "queue_full" or "timeout".
+        """
+        if self.active < self.limit and not self.waiters:
+            self.active += 1
+            return None
+        if len(self.waiters) >= self.queue:
+            return "queue_full"
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.timeout)
+        except asyncio.TimeoutError:
+            # The deadline raced a slot being handed over; keep the slot.
+            if waiter.done() and not waiter.cancelled():
+                return None
+            return "timeout"
+        except asyncio.CancelledError:
+            # A slot handed over just before the client went away goes to the next waiter.
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+        return None
+
+
+    def release(self) -> None:
+        # Hand the slot straight to the next live waiter, keeping active unchanged.
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class AdmissionMiddleware():
+    """
+    Pure ASGI middleware that bounds the concurrency of each configured route
+    with a Gate, so an expensive route under overload can't starve cheap ones
+    or queue without limit on the database pool. Requests that can't be
+    admitted within their route's queue bound and deadline get an immediate
+    503 with Retry-After, and are counted in core.metrics. Routes without a
+    limit, and the App when ADMISSION_LIMITS is unset, pass straight through.
+    """
+
+    def __init__(self, app, limits: dict = None, retry_after: int = None):
+        self.app = app
+        limits = parse_limits(settings.ADMISSION_LIMITS) if limits is None else limits
+        self.gates: dict = {route: Gate(route, *limit) for route, limit in limits.items()}
+        self.default: Gate | None = self.gates.get("*")
+        self.retry_after: bytes = str(settings.ADMISSION_RETRY_AFTER if retry_after is None else retry_after).encode()
+        metrics.registry.gates.update(self.gates)
+
+
+    def gate_for(self, scope) -> Gate | None:
+        path = scope["path"]
+        return self.gates.get(f"{scope['method']} {path}") or self.gates.get(path) or self.default
+
+
+    async def __call__(self, scope, receive, send):
+        gate = self.gate_for(scope) if scope["type"] == "http" and self.gates else None
+        if gate is None:
+            return await self.app(scope, receive, send)
+
+        reason = await gate.acquire()
+        if reason is not None:
+            metrics.registry.observe_shed(gate.route, reason)
+            body = orjson.dumps({"detail": "The server is overloaded, retry later"})
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [(b"content-type", b"application/json"),
+                            (b"content-length", str(len(body)).encode()),
+                            (b"retry-after", self.retry_after)],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
@@ -0,0 +1,70 @@
+import codecs
+import csv
+from typing import AsyncIterable, AsyncIterator
+
+import orjson
+
+NAMESPACE: str = "Core Bulk"
+
+
+async def iter_lines(stream: AsyncIterable[bytes]) -> AsyncIterator[tuple[int, str]]:
+    """
+    Split a byte stream into (line number, text) pairs as it arrives. Only the
+    current partial line is held in memory; blank lines are skipped.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending: str = ""
+    number: int = 0
+    async for chunk in stream:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            number += 1
+            if line.strip():
+                yield number, line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending.strip():
+        yield number + 1, pending.rstrip("\r")
+
+
+async def iter_records(stream: AsyncIterable[bytes], content_type: str = "") -> AsyncIterator[tuple[int, dict | Exception]]:
+    """
+    Parse a JSON-lines stream, or a CSV stream with a header row when
+    content_type is text/csv, into (line number, record) pairs. A line that
+    can't be parsed is yielded with the ValueError in place of its record.
+    """
+    is_csv = "csv" in (content_type or "")
+    header: list | None = None
+    async for number, line in iter_lines(stream):
+        if not is_csv:
+            try:
+                record = orjson.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("Expected a JSON object")
+            except ValueError as exc:
+                yield number, ValueError(str(exc))
+                continue
+            yield number, record
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [value.strip() for value in values]
+            continue
+        if len(values) != len(header):
+            yield number, ValueError(f"Expected {len(header)} columns, got {len(values)}")
+            continue
+        yield number, dict(zip(header, values))
+
+
+async def chunked(records: AsyncIterable, size: int) -> AsyncIterator[list]:
+    """
+    Group an async iterable into lists of at most size items.
+    """
+    chunk: list = []
+    async for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,114 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable
+
+NAMESPACE: str = "Core Cache"
+
+
+class TTLCache():
+    """
+    Bounded in-process cache with least-recently-used eviction and a per-entry
+    time to live. An entry can also be registered under alias keys so callers
+    that only know e.g. a username can still invalidate it. Hit, miss, eviction
+    and expiration counters are kept so the cache can be sized from stats().
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0, timer=time.monotonic):
+        self.maxsize: int = maxsize
+        self.ttl: float = ttl
+        self.timer = timer
+        self._data: OrderedDict = OrderedDict()
+        self._aliases: dict = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+         Return the value stored for key, refreshing its recency, or default when
+         the key is missing or its time to live has elapsed.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires, value, _ = entry
+            if expires <= self.timer():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+
+    def set(self, key: Hashable, value: Any, aliases: Iterable[Hashable] = (), ttl: float = None) -> None:
+        """
+         Store value under key for ttl seconds (defaults to the cache's ttl),
+         evicting the least recently used entries once maxsize is exceeded.
+        """
+        if self.maxsize <= 0:
+            return
+        aliases = tuple(aliases)
+        expires = self.timer() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (expires, value, aliases)
+            for alias in aliases:
+                self._aliases.setdefault(alias, set()).add(key)
+            while len(self._data) > self.maxsize:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+
+    def invalidate(self, key: Hashable) -> bool:
+        """
+         Drop the entry stored under key, or every entry an alias points to.
+
+         Returns:
+         	 True if an entry was removed, False otherwise.
+        """
+        with self._lock:
+            keys = [key] if key in self._data else list(self._aliases.get(key, ()))
+            for _key in keys:
+                self._remove(_key)
+                self.invalidations += 1
+            return bool(keys)
+
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._aliases.clear()
+
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+    def _remove(self, key: Hashable) -> None:
+        # Caller must hold the lock.
+        _, _, aliases = self._data.pop(key)
+        for alias in aliases:
+            keys = self._aliases.get(alias)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._aliases[alias]
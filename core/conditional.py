@@ -0,0 +1,30 @@
+from starlette.responses import Response
+
+NAMESPACE: str = "Core Conditional"
+
+# Clients must revalidate every time, but may keep the representation privately.
+CACHE_CONTROL: str = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """
+    A strong entity tag built from the parts that identify a representation,
+    e.g. make_etag(user.pk, user.version, "profile") -> '"1.3.profile"'.
+    """
+    return '"' + ".".join(str(part) for part in parts) + '"'
+
+
+def if_none_match(header: str | None, etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches etag, so the client's copy is
+    still current. Uses the weak comparison RFC 7232 asks for on GET.
+    """
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
@@ -1,10 +1,15 @@
 import dotenv
-from os import getenv
+import orjson
+from decimal import Decimal
+from os import getenv, path
 from typing import List
-from pydantic import AnyHttpUrl
+from pydantic import AnyHttpUrl, BaseModel
 from fastapi.responses import JSONResponse
 
-dotenv.load_dotenv()
+from core import timing
+
+# Read from the project root directly rather than searched for from the caller's frame.
+dotenv.load_dotenv(path.join(path.dirname(path.dirname(path.abspath(__file__))), ".env"))
 
 
 class Settings():
@@ -13,6 +18,8 @@ class Settings():
         getenv("BACKEND_CORS_ORIGINS")] or None
     BACKEND_PORT: int = getenv("UVICORN_PORT") or 8000
     BACKEND_HOST: str = getenv("UVICORN_HOST") or "127.0.0.1"
+    #Debug mode adds per-request SQL statement headers & query budget warnings
+    DEBUG: bool = str(getenv("DEBUG")).lower() in ("1", "true", "yes")
 
     DB_USER: str = getenv("DB_USER")
     DB_PASS: str = getenv("DB_PASS")
@@ -21,20 +28,123 @@ class Settings():
     DB_PORT: int = getenv("DB_PORT")
     DB_DRIVER: str = getenv("DB_DRIVER")
     #MySQL structure
-    DB_URL: str = f"{DB_DRIVER}://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    DB_URL: str = getenv("DB_URL") or f"{DB_DRIVER}://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     #Postgress Structure
     #DB_URL: str = f"{DB_DRIVER}://{DB_USER}:{DB_PASS}@{DB_HOST}{DB_NAME}"
 
+    #Serverless deployments: work relying on a background thread or the shutdown hook
+    #(lastLogin write-behind) is off by default
+    SERVERLESS: bool = str(getenv("SERVERLESS")).lower() in ("1", "true", "yes")
+
+    #Connection pool, shared by the sync and asyncio engines
+    DB_POOL_SIZE: int = int(getenv("DB_POOL_SIZE") or 5)
+    DB_MAX_OVERFLOW: int = int(getenv("DB_MAX_OVERFLOW") or 10)
+    DB_POOL_TIMEOUT: float = float(getenv("DB_POOL_TIMEOUT") or 30)
+    DB_POOL_RECYCLE: int = int(getenv("DB_POOL_RECYCLE") or -1)
+    DB_POOL_PRE_PING: bool = str(getenv("DB_POOL_PRE_PING")).lower() in ("1", "true", "yes")
+
+    #Asyncio structure, used by the AsyncSession when DB_ASYNC is enabled
+    #SQLite stand-in example: DB_ASYNC_URL = "sqlite+aiosqlite:///./local.db"
+    DB_ASYNC: bool = str(getenv("DB_ASYNC")).lower() in ("1", "true", "yes")
+    DB_ASYNC_DRIVER: str = getenv("DB_ASYNC_DRIVER") or "mysql+aiomysql"
+    DB_ASYNC_URL: str = getenv("DB_ASYNC_URL") or f"{DB_ASYNC_DRIVER}://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+    #Read replicas, comma separated URLs for the sync & asyncio engines; reads use the primary when unset
+    #SQLite stand-in example: DB_REPLICA_URLS = "sqlite:///./replica.db"
+    DB_REPLICA_URLS: list = [url.strip() for url in (getenv("DB_REPLICA_URLS") or "").split(",") if url.strip()]
+    DB_ASYNC_REPLICA_URLS: list = [url.strip() for url in (getenv("DB_ASYNC_REPLICA_URLS") or "").split(",") if url.strip()]
+    #Seconds a user's reads stay on the primary after their own write
+    DB_READ_YOUR_WRITES: float = float(getenv("DB_READ_YOUR_WRITES") or 5)
+
+    #Admission control: comma separated "route=concurrency:queue:timeout" limits, see core.admission
+    #e.g. ADMISSION_LIMITS = "POST /auth/token=8:32:0.5,*=64:256:1"
+    ADMISSION_LIMITS: str = getenv("ADMISSION_LIMITS") or ""
+    ADMISSION_RETRY_AFTER: int = int(getenv("ADMISSION_RETRY_AFTER") or 1)
+
+    #Server logging: minimum level and JSON-lines output
+    LOG_LEVEL: str = getenv("LOG_LEVEL") or "DEBUG"
+    LOG_JSON: bool = str(getenv("LOG_JSON")).lower() in ("1", "true", "yes")
+
     PEPPER: str = getenv("HASH_PEPPER")
     SALT: str = getenv("HASH_SALT")
 
     AUTH_SECRET = str = getenv("AUTH_SECRET")
 
+    #Verified JWT payload cache used by AuthHandler.decode_token
+    TOKEN_CACHE_SIZE: int = int(getenv("TOKEN_CACHE_SIZE") or 4096)
+    TOKEN_CACHE_TTL: float = float(getenv("TOKEN_CACHE_TTL") or 300)
+
+    #Seconds between syncs of the revoked token store with the database; 0 loads it only at startup
+    REVOCATION_SYNC_INTERVAL: float = float(getenv("REVOCATION_SYNC_INTERVAL") or 30)
+    #Seconds of revocations each sync re-reads, for rows committed after a later row was synced
+    REVOCATION_SYNC_OVERLAP: float = float(getenv("REVOCATION_SYNC_OVERLAP") or 60)
+
+    #Keyset pagination of /auth/users_all
+    USERS_PAGE_SIZE: int = int(getenv("USERS_PAGE_SIZE") or 50)
+    USERS_PAGE_MAX: int = int(getenv("USERS_PAGE_MAX") or 500)
+
+    #Batch lookup of users by UUID: most UUIDs per request, and per IN query
+    USERS_LOOKUP_MAX: int = int(getenv("USERS_LOOKUP_MAX") or 2000)
+    USERS_LOOKUP_CHUNK: int = int(getenv("USERS_LOOKUP_CHUNK") or 500)
+
+    #Address book: page sizes of the listing, most addresses per bulk upsert, and rows per upsert statement
+    ADDRESSES_PAGE_SIZE: int = int(getenv("ADDRESSES_PAGE_SIZE") or 50)
+    ADDRESSES_PAGE_MAX: int = int(getenv("ADDRESSES_PAGE_MAX") or 500)
+    ADDRESSES_UPSERT_MAX: int = int(getenv("ADDRESSES_UPSERT_MAX") or 5000)
+    ADDRESSES_UPSERT_CHUNK: int = int(getenv("ADDRESSES_UPSERT_CHUNK") or 500)
+
+    #Authenticated principal cache used by getCurrentUser
+    USER_CACHE_SIZE: int = int(getenv("USER_CACHE_SIZE") or 1024)
+    USER_CACHE_TTL: float = float(getenv("USER_CACHE_TTL") or 30)
+
+    #Write-behind batching of lastLogin updates; disable to update synchronously on login. Off by
+    #default under SERVERLESS, where buffered writes could be lost with a frozen or recycled instance
+    LAST_LOGIN_WRITE_BEHIND: bool = (getenv("LAST_LOGIN_WRITE_BEHIND") or ("false" if SERVERLESS else "true")
+                                     ).lower() in ("1", "true", "yes")
+    LAST_LOGIN_BATCH_SIZE: int = int(getenv("LAST_LOGIN_BATCH_SIZE") or 500)
+    LAST_LOGIN_FLUSH_INTERVAL: float = float(getenv("LAST_LOGIN_FLUSH_INTERVAL") or 1.0)
+
+    #Password hashing pool used by core.hash.hasher: "thread" or "process", and its worker count
+    HASH_POOL: str = getenv("HASH_POOL") or "thread"
+    HASH_WORKERS: int = int(getenv("HASH_WORKERS") or 4)
+
+    #Bulk user import: records per validated & inserted chunk, and reported errors
+    IMPORT_CHUNK_SIZE: int = int(getenv("IMPORT_CHUNK_SIZE") or 500)
+    IMPORT_MAX_ERRORS: int = int(getenv("IMPORT_MAX_ERRORS") or 1000)
+
 
 settings = Settings()
 
 
-class JsonRender(JSONResponse):
+def orjson_default(obj):
+    """
+    Fallback for the types orjson does not serialize natively. ORM instances are
+    rendered from their loaded attributes, skipping SQLAlchemy's internal state,
+    the same way jsonable_encoder does.
+    """
+    if hasattr(obj, "_sa_instance_state"):
+        return {key: value for key, value in obj.__dict__.items() if not key.startswith("_sa")}
+    if isinstance(obj, BaseModel):
+        return obj.dict()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson, which natively handles datetimes and,
+    through orjson_default, ORM instances and pydantic models. This is the
+    App's default response class.
+    """
+    def render(self, content) -> bytes:
+        with timing.phase("serialize"):
+            return orjson.dumps(content, default=orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class JsonRender(OrjsonResponse):
     """
     This Class was created to return certain content that would
     allow content that needs to be return as an object to utilize
@@ -1,6 +1,135 @@
+import asyncio
 import hashlib
+import hmac
+from concurrent.futures import Executor, ThreadPoolExecutor
+from itertools import repeat
+
 from core.config import settings
 
+NAMESPACE: str = "Core Hash"
+
+# Digest states that have already absorbed the salt; each hash copies one
+# instead of rebuilding and re-absorbing the salted string.
+_SALTED: dict = {
+    "sha3_256": hashlib.sha3_256(f"{settings.SALT}".encode()),
+    "sha3_512": hashlib.sha3_512(f"{settings.SALT}".encode()),
+}
+
+
+def digest(key: str, pepper: str, algorithm: str = "sha3_256") -> str:
+    """
+    The salted & peppered hex digest of key, identical to Hash.encode but
+    without its argument checks.
+    """
+    state = _SALTED[algorithm].copy()
+    state.update(f"{key}{pepper}".encode())
+    return state.hexdigest()
+
+
+def storage_hash(psw: str, pepper: str) -> str:
+    """
+    The value stored in User.password, the digest of the password's digest.
+    """
+    return digest(digest(psw, pepper), pepper)
+
+
+def verify_password(psw: str, stored: str, pepper: str) -> bool:
+    """
+    Compare a plain password against a storage_hash in constant time.
+    """
+    return isinstance(stored, str) and hmac.compare_digest(storage_hash(psw, pepper), stored)
+
+
+def _storage_hash_batch(passwords: list, pepper: str) -> list:
+    return [storage_hash(psw, pepper) for psw in passwords]
+
+
+def _verify_batch(pairs: list, pepper: str) -> list:
+    return [verify_password(psw, stored, pepper) for psw, stored in pairs]
+
+
+class Hasher():
+    """
+    Runs password hashing on a thread or process pool so it never blocks the
+    event loop. Single hashes have async variants for request handlers; the
+    *_many methods split a batch into one slice per worker, for bulk import
+    and audit jobs. Pool threads still share the GIL, so a process pool is the
+    choice when hashing throughput matters more than start-up cost.
+    """
+
+    def __init__(self, pool: str = "thread", workers: int = 4, pepper: str = settings.PEPPER):
+        self.pool: str = pool
+        self.workers: int = max(workers, 1)
+        self.pepper: str = pepper
+        self._executor: Executor | None = None
+
+
+    @property
+    def executor(self) -> Executor:
+        # Created on first use so importing the module never starts workers, or imports multiprocessing.
+        if self._executor is None and self.pool == "process":
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        elif self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hasher")
+        return self._executor
+
+
+    def storage_hash(self, psw: str) -> str:
+        return storage_hash(psw, self.pepper)
+
+
+    def verify(self, psw: str, stored: str) -> bool:
+        return verify_password(psw, stored, self.pepper)
+
+
+    def storage_hash_many(self, passwords: list) -> list:
+        """
+         Hash a batch of passwords on the pool, keeping their order.
+        """
+        return self._map(_storage_hash_batch, list(passwords))
+
+
+    def verify_many(self, pairs: list) -> list:
+        """
+         Verify a batch of (password, stored hash) pairs on the pool.
+
+         Returns:
+         	 A list of booleans, in the order of pairs.
+        """
+        return self._map(_verify_batch, list(pairs))
+
+
+    async def storage_hash_async(self, psw: str) -> str:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, storage_hash, psw, self.pepper)
+
+
+    async def verify_async(self, psw: str, stored: str) -> bool:
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, verify_password, psw, stored, self.pepper)
+
+
+    async def verify_many_async(self, pairs: list) -> list:
+        return await asyncio.get_running_loop().run_in_executor(None, self.verify_many, pairs)
+
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+    def _map(self, batch_fn, items: list) -> list:
+        if not items:
+            return []
+        size = -(-len(items) // self.workers)
+        slices = [items[start:start + size] for start in range(0, len(items), size)]
+        return [result for batch in self.executor.map(batch_fn, slices, repeat(self.pepper)) for result in batch]
+
+
+# Shared hasher used by the auth handlers, see HASH_POOL and HASH_WORKERS.
+hasher = Hasher(pool=settings.HASH_POOL, workers=settings.HASH_WORKERS)
+
 
 class Hash():
 
@@ -13,8 +142,6 @@ class Hash():
         If no algorithm is Selected, the default algorithm of sha3_256 will
         be selected.
         """
-        saltKeyPepper: str = f"{settings.SALT}{key}{pepper}"
-
         if type(key) is not str:
             raise Exception(
                 "value passed was not a str; argument must be a String")
@@ -24,32 +151,21 @@ class Hash():
         if algorithm and type(algorithm) is not str:
             raise Exception(
                 "value passed was not Falsy or a str; Field must either be blank, Falsy, or a String")
+        if (algorithm or "sha3_256") not in _SALTED:
+            raise Exception("incorrect algorithm used. Please utilize one of the following algorithms: sha3_256 & sha3_512. Or leave algorithm field blank, which will invoke default algorithm, which is sha3_256")
 
-        try:
-            encoder: str | None = hashlib.sha3_256(saltKeyPepper.encode()).hexdigest() if algorithm is str(
-            "sha3_256") or not algorithm else hashlib.sha3_512(saltKeyPepper.encode()).hexdigest() if algorithm is str(
-                "sha3_512") else None
-
-            if not encoder:
-                raise Exception("incorrect algorithm used. Please utilize one of the following algorithms: sha3_256 & sha3_512. Or leave algorithm field blank, which will invoke default algorithm, which is sha3_256")
-            
-            return encoder
-
-        except Exception as exc:
-            raise exc
+        return digest(key, pepper, algorithm or "sha3_256")
 
 
     def verify(key: str, encoded_key: str, pepper: str, algorithm: str = None) -> bool:
         """
         class Based function that takes in a key, a hash of a key, & optional algorithm arguments
-        to return a True or False value depending on the comparison of the  salted & peppered two 
+        to return a True or False value depending on the comparison of the  salted & peppered two
         provided keys. Avaiable algorithms are sha3_256 & sha3_512.
 
         If no algorithm is Selected, the default algorithm of sha3_256 will be
         be selected.
         """
-        saltKeyPepper: str = f"{settings.SALT}{key}{pepper}"
-
         if type(key) is not str:
             raise Exception(
                 "key passed wasn't a str; argument must be a String")
@@ -62,16 +178,7 @@ class Hash():
         if algorithm and type(algorithm) is not str:
             raise Exception(
                 "value passed was not None or a str; Field must either be blank, or a String")
+        if (algorithm or "sha3_256") not in _SALTED:
+            return False
 
-        try:
-            encoder:hashlib.sha3_256 = hashlib.sha3_256(saltKeyPepper.encode()).hexdigest() if algorithm is str(
-            "sha3_256") or not algorithm else hashlib.sha3_512(saltKeyPepper.encode()).hexdigest() if algorithm is str(
-                "sha3_512") else None
-
-            if not encoder or encoder != encoded_key:
-                return False
-            
-            return True
-                
-        except Exception as exc:
-            raise exc
\ No newline at end of file
+        return hmac.compare_digest(digest(key, pepper, algorithm or "sha3_256"), encoded_key)
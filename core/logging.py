@@ -1,4 +1,92 @@
+import atexit
+import logging
+import queue
+import sys
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+import orjson
+
+from core.config import settings
+
+# Server messages are put on a queue by the caller and formatted & written to
+# stdout by a background thread, so logging never blocks a request on I/O.
+_logger: logging.Logger = logging.getLogger("server")
+_logger.propagate = False
+_listener: QueueListener | None = None
+
+
+class TextFormatter(logging.Formatter):
+    """
+    Formats a record as the original print based lines:
+    [datetime] [NAMESPACE] [LEVEL] Message, [object] obj
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        line = f"[{datetime.fromtimestamp(record.created)}] [{record.namespace}] [{record.levelname}] {record.msg}"
+        if record.obj:
+            line = f"{line}, [object] {record.obj}"
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats a record as a single JSON line.
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(),
+            "namespace": record.namespace,
+            "level": record.levelname,
+            "message": record.msg,
+        }
+        if record.obj:
+            entry["object"] = record.obj
+        return orjson.dumps(entry).decode()
+
+
+class _DeferredQueueHandler(QueueHandler):
+    # The stock QueueHandler formats in the calling thread; leave that to the listener.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure(level: str = None, json_lines: bool = None) -> None:
+    """
+    (Re)configure the server logger: the minimum level and whether lines are
+    written as text or JSON. Restarts the background writer thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+    level = level or settings.LOG_LEVEL
+    json_lines = settings.LOG_JSON if json_lines is None else json_lines
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter() if json_lines else TextFormatter())
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    _logger.handlers.clear()
+    _logger.addHandler(_DeferredQueueHandler(log_queue))
+    _logger.setLevel(level.upper())
+    _listener = QueueListener(log_queue, stream)
+    _listener.start()
+
+
+def shutdown() -> None:
+    """
+    Flush every queued message and stop the background writer thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _log(level: int, NAMESPACE: str, Message: str, obj=None):
+    # Disabled levels return before any formatting work is done.
+    if not _logger.isEnabledFor(level):
+        return
+    _logger.log(level, Message, extra={"namespace": NAMESPACE, "obj": str(obj) if obj else None})
 
 
 def ServerDateTime():
@@ -7,28 +95,20 @@ def ServerDateTime():
 
 
 def ServerINFO(NAMESPACE: str, Message: str, obj=None):
-    if obj:
-        print(f"[{ServerDateTime()}] [{NAMESPACE}] [INFO] {Message}, [object] {obj}")
-    else:
-        print(f"[{ServerDateTime()}] [{NAMESPACE}] [INFO] {Message}")
+    _log(logging.INFO, NAMESPACE, Message, obj)
 
 
 def ServerWARNING(NAMESPACE: str, Message: str, obj=None):
-    if obj:
-        print(f"[{ServerDateTime()}] [{NAMESPACE}] [WARNING] {Message}, [object] {obj}")
-    else:
-        print(f"[{ServerDateTime()}] [{NAMESPACE}] [WARNING] {Message}")
+    _log(logging.WARNING, NAMESPACE, Message, obj)
 
 
 def ServerERROR(NAMESPACE: str, Message: str, obj=None):
-    if obj:
-        print(f"[{ServerDateTime()}] [{NAMESPACE}] [ERROR] {Message}, [object] {obj}")
-    else:
-        print(f"[{ServerDateTime()}] [{NAMESPACE}] [ERROR] {Message}")
+    _log(logging.ERROR, NAMESPACE, Message, obj)
 
 
 def ServerDEBUG(NAMESPACE: str, Message: str, obj=None):
-    if obj:
-        print(f"[{ServerDateTime()}] [{NAMESPACE}] [DEBUG] {Message}, [object] {obj}")
-    else:
-        print(f"[{ServerDateTime()}] [{NAMESPACE}] [DEBUG] {Message}")
+    _log(logging.DEBUG, NAMESPACE, Message, obj)
+
+
+configure()
+atexit.register(shutdown)
@@ -0,0 +1,143 @@
+from bisect import bisect_left
+
+NAMESPACE: str = "Core Metrics"
+
+# Upper bounds, in seconds, of the request latency histogram buckets.
+LATENCY_BUCKETS: tuple = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram():
+    """
+    Prometheus style histogram. Observations increment a single bucket; the
+    cumulative counts are only computed when the metrics are rendered.
+    """
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts: list = [0] * (len(bounds) + 1)
+        self.sum: float = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Registry():
+    """
+    Request and database metrics rendered in the Prometheus text format.
+
+    Every observation is made by core.middleware.TimingMiddleware on the event
+    loop thread once a request has finished, so the collection path needs no
+    locks: a few dict lookups and integer increments per request. Database
+    statements are first counted per request through core.timing.
+    """
+
+    def __init__(self):
+        self.in_flight: int = 0
+        self.requests: dict = {}        # (method, route, status) -> count
+        self.latency: dict = {}         # (method, route) -> Histogram
+        self.db_queries: dict = {}      # (method, route) -> count
+        self.db_seconds: dict = {}      # (method, route) -> seconds
+        self.shed: dict = {}            # (route, reason) -> count
+        self.gates: dict = {}           # route -> core.admission.Gate
+
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float,
+                        queries: int = 0, db_seconds: float = 0.0) -> None:
+        key = (method, route)
+        requests_key = (method, route, status)
+        self.requests[requests_key] = self.requests.get(requests_key, 0) + 1
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = Histogram()
+        histogram.observe(seconds)
+        if queries:
+            self.db_queries[key] = self.db_queries.get(key, 0) + queries
+            self.db_seconds[key] = self.db_seconds.get(key, 0.0) + db_seconds
+
+
+    def observe_shed(self, route: str, reason: str) -> None:
+        key = (route, reason)
+        self.shed[key] = self.shed.get(key, 0) + 1
+
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_requests_total Requests served, by route and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in list(self.requests.items()):
+            lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {count}')
+
+        lines += [
+            "# HELP http_request_duration_seconds Request latency, by route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), histogram in list(self.latency.items()):
+            labels = f'method="{method}",route="{route}"'
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            cumulative += histogram.counts[-1]
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {cumulative}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {cumulative}")
+
+        lines += [
+            "# HELP db_queries_total SQL statements executed, by route.",
+            "# TYPE db_queries_total counter",
+        ]
+        for (method, route), count in list(self.db_queries.items()):
+            lines.append(f'db_queries_total{{method="{method}",route="{route}"}} {count}')
+        lines += [
+            "# HELP db_query_duration_seconds_total Time spent executing SQL statements, by route.",
+            "# TYPE db_query_duration_seconds_total counter",
+        ]
+        for (method, route), seconds in list(self.db_seconds.items()):
+            lines.append(f'db_query_duration_seconds_total{{method="{method}",route="{route}"}} {seconds}')
+
+        lines += [
+            "# HELP http_requests_shed_total Requests refused by admission control, by limited route and reason.",
+            "# TYPE http_requests_shed_total counter",
+        ]
+        for (route, reason), count in list(self.shed.items()):
+            lines.append(f'http_requests_shed_total{{route="{route}",reason="{reason}"}} {count}')
+        lines += [
+            "# HELP admission_active Requests admitted and being served, by limited route.",
+            "# TYPE admission_active gauge",
+        ]
+        for route, gate in list(self.gates.items()):
+            lines.append(f'admission_active{{route="{route}"}} {gate.active}')
+        lines += [
+            "# HELP admission_queued Requests waiting for admission, by limited route.",
+            "# TYPE admission_queued gauge",
+        ]
+        for route, gate in list(self.gates.items()):
+            lines.append(f'admission_queued{{route="{route}"}} {len(gate.waiters)}')
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def route_template(scope) -> str:
+    """
+    The path template of the route that served the request, e.g. /auth/users_all,
+    so labels stay bounded. Unmatched paths are grouped under "unmatched".
+    """
+    endpoint = scope.get("endpoint")
+    app = scope.get("app")
+    if endpoint is None or app is None:
+        return "unmatched"
+    templates = getattr(app.state, "route_templates", None)
+    if templates is None:
+        templates = app.state.route_templates = {}
+        for route in app.routes:
+            if hasattr(route, "endpoint") and hasattr(route, "path"):
+                templates.setdefault(route.endpoint, route.path)
+    return templates.get(endpoint, "unmatched")
@@ -0,0 +1,79 @@
+from time import perf_counter
+
+import orjson
+
+from core import metrics, timing
+from core.config import settings
+from core.logging import ServerERROR, ServerWARNING
+
+NAMESPACE: str = "Core Middleware"
+
+
+class TimingMiddleware():
+    """
+    Pure ASGI middleware that times every HTTP request on a monotonic clock and
+    reports it through the X-Process-Time and Server-Timing headers, the latter
+    split into the auth, db and serialize phases recorded through core.timing.
+    Unhandled errors are turned into JSON responses, a KeyError into a 404.
+    Each finished request is also observed by the core.metrics registry.
+    In DEBUG the request's SQL statement count and time are reported through
+    the X-DB-Queries & X-DB-Time headers, and exceeding a route's query_budget
+    is logged.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = perf_counter()
+        timings = timing.start_request()
+        response_started = False
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal response_started, status_code
+            if message["type"] == "http.response.start":
+                response_started = True
+                status_code = message["status"]
+                total = perf_counter() - start
+                headers = list(message.get("headers", []))
+                headers.append((b"x-process-time", f"{total}/s".encode()))
+                headers.append((b"server-timing", timing.server_timing(timings.phases, total).encode()))
+                if settings.DEBUG:
+                    headers.append((b"x-db-queries", str(timings.queries).encode()))
+                    headers.append((b"x-db-time", f"{timings.phases.get('db', 0.0) * 1000:.3f}ms".encode()))
+                    budget = getattr(scope.get("endpoint"), "query_budget", None)
+                    if budget is not None and timings.queries > budget:
+                        ServerWARNING(NAMESPACE, f"{scope['method']} {scope['path']} issued {timings.queries} "
+                                                 f"SQL statements, over its budget of {budget}")
+                message = {**message, "headers": headers}
+            await send(message)
+
+        metrics.registry.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            if response_started:
+                raise
+            ServerERROR(NAMESPACE, f"Unhandled error on {scope.get('path')}", exc)
+            if isinstance(exc, KeyError):
+                status_code, detail = 404, "The requested resource does not exist"
+            else:
+                status_code, detail = 500, str(exc)
+            body = orjson.dumps({"detail": detail})
+            await send_wrapper({
+                "type": "http.response.start",
+                "status": status_code,
+                "headers": [(b"content-type", b"application/json"),
+                            (b"content-length", str(len(body)).encode())],
+            })
+            await send_wrapper({"type": "http.response.body", "body": body})
+        finally:
+            metrics.registry.in_flight -= 1
+            metrics.registry.observe_request(
+                scope["method"], metrics.route_template(scope), status_code, perf_counter() - start,
+                timings.queries, timings.phases.get("db", 0.0))
@@ -0,0 +1,28 @@
+import base64
+import json
+
+NAMESPACE: str = "Core Pagination"
+
+
+def encode_cursor(**position) -> str:
+    """
+    Encode a keyset position, e.g. encode_cursor(pk=42), into an opaque
+    url-safe cursor string that clients hand back to fetch the next page.
+    """
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """
+    Decode a cursor produced by encode_cursor back into its keyset position.
+    Raises ValueError when the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception as exc:
+        raise ValueError("Malformed cursor") from exc
+    if not isinstance(position, dict):
+        raise ValueError("Malformed cursor")
+    return position
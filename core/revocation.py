@@ -0,0 +1,119 @@
+import threading
+import time
+from datetime import timedelta
+from typing import Callable, Hashable
+
+from core.logging import ServerERROR
+
+NAMESPACE: str = "Core Revocation"
+
+
+class RevocationStore():
+    """
+    In-memory set of revoked token ids, each kept until its token expires, so
+    checking a token is a single dict lookup and never a query. The set mirrors
+    a database table through loader(since), which returns the (recorded at, token
+    id, expires timestamp) rows recorded at or after since, a datetime of the
+    database's clock, or every row when since is None. refresh() asks for the rows
+    since the latest one seen less overlap seconds, so the periodic syncs picking
+    up the revocations of other workers stay incremental yet still load a row that
+    committed after a later one was read, as concurrent logouts can.
+    """
+
+    def __init__(self, loader: Callable[[object], list], interval: float = 30.0, overlap: float = 60.0,
+                 timer=time.time):
+        self.loader = loader
+        self.interval: float = interval
+        self.overlap: timedelta = timedelta(seconds=overlap)
+        self.timer = timer
+        self.cursor = None
+        self._revoked: dict = {}
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.revoked = self.loaded = self.syncs = self.failures = 0
+
+
+    def __contains__(self, token_id: Hashable) -> bool:
+        return token_id in self._revoked
+
+
+    @property
+    def ready(self) -> bool:
+        """
+         Whether a load has succeeded; until then the store can't tell a revoked token.
+        """
+        return self.syncs > 0
+
+
+    def add(self, token_id: Hashable, expires: float) -> None:
+        """
+         Revoke token_id in this process until expires, a Unix timestamp.
+        """
+        with self._lock:
+            self._revoked[token_id] = expires
+            self.revoked += 1
+
+
+    def refresh(self) -> int:
+        """
+         Load the revocations recorded since the last refresh, re-reading the
+         overlap window, and drop the expired ones.
+
+         Returns:
+         	 The number of revocations new to this store.
+        """
+        since = None if self.cursor is None else self.cursor - self.overlap
+        try:
+            rows = self.loader(since)
+        except Exception as exc:
+            self.failures += 1
+            ServerERROR(NAMESPACE, "Loading revoked tokens failed", exc)
+            return 0
+        now = self.timer()
+        with self._lock:
+            loaded = 0
+            for recorded_at, token_id, expires in rows:
+                loaded += token_id not in self._revoked
+                self._revoked[token_id] = expires
+                if self.cursor is None or recorded_at > self.cursor:
+                    self.cursor = recorded_at
+            self._revoked = {token_id: expires for token_id, expires in self._revoked.items() if expires > now}
+            self.loaded += loaded
+            self.syncs += 1
+        return loaded
+
+
+    def start(self) -> None:
+        """
+         Start the thread refreshing the store every interval seconds. The first
+         refresh is left to the caller, before it serves any request.
+        """
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._closed.clear()
+        self._thread = threading.Thread(target=self._run, name=NAMESPACE, daemon=True)
+        self._thread.start()
+
+
+    def close(self) -> None:
+        self._closed.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+            self._thread = None
+
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._revoked),
+            "revoked": self.revoked,
+            "loaded": self.loaded,
+            "syncs": self.syncs,
+            "failures": self.failures,
+        }
+
+
+    def _run(self) -> None:
+        while self.interval > 0 and not self._closed.wait(self.interval):
+            self.refresh()
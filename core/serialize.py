@@ -0,0 +1,74 @@
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_LIST, SHAPE_SEQUENCE, SHAPE_SET, SHAPE_SINGLETON, SHAPE_TUPLE_ELLIPSIS
+
+NAMESPACE: str = "Core Serialize"
+
+_SEQUENCE_SHAPES: tuple = (SHAPE_LIST, SHAPE_SEQUENCE, SHAPE_SET, SHAPE_TUPLE_ELLIPSIS)
+
+
+def _nested_model(field) -> type | None:
+    # The schema a field nests, including through a Union such as `ProfileBase | None | object`.
+    for candidate in (field.type_, *(sub.type_ for sub in field.sub_fields or ())):
+        if isinstance(candidate, type) and issubclass(candidate, BaseModel):
+            return candidate
+    return None
+
+
+class Serializer():
+    """
+    Renders trusted ORM rows straight to the dict a pydantic schema would produce,
+    with its exclusions applied, skipping from_orm and the re-validation FastAPI
+    runs for a response_model. For every ORM class it meets, the serializer compiles
+    one function building the dict in a single expression: attributes the class has
+    are read directly and the rest take the field's default, as from_orm would.
+    Nested schemas and lists of them get their own Serializer. Values are left as is
+    (datetimes included) for orjson to render.
+    """
+
+    def __init__(self, schema: type, exclude: set | list = ()):
+        self.schema: type = schema
+        self.exclude: frozenset = frozenset(exclude)
+        self.fields: list = [field for name, field in schema.__fields__.items() if name not in self.exclude]
+        self.nested: dict = {}
+        for field in self.fields:
+            model = _nested_model(field)
+            if model is not None and field.shape in (SHAPE_SINGLETON, *_SEQUENCE_SHAPES):
+                self.nested[field.name] = Serializer(model)
+        self._compiled: dict = {}
+
+
+    def __call__(self, obj) -> dict | None:
+        if obj is None:
+            return None
+        render = self._compiled.get(type(obj))
+        if render is None:
+            render = self._compiled[type(obj)] = self.compile(type(obj))
+        return render(obj)
+
+
+    def many(self, objs) -> list:
+        return [self(obj) for obj in objs]
+
+
+    def compile(self, source: type):
+        """
+         Build the render function of this schema for instances of source.
+        """
+        namespace, items = {}, []
+        for position, field in enumerate(self.fields):
+            if not hasattr(source, field.name):
+                # Missing on the ORM class: from_orm falls back to the field's default.
+                namespace[f"_d{position}"] = field.default
+                value = f"_d{position}"
+            elif field.name in self.nested and field.shape == SHAPE_SINGLETON:
+                namespace[f"_n{position}"] = self.nested[field.name]
+                value = f"_n{position}(obj.{field.name})"
+            elif field.name in self.nested:
+                namespace[f"_n{position}"] = self.nested[field.name].many
+                value = f"(None if (v{position} := obj.{field.name}) is None else _n{position}(v{position}))"
+            else:
+                value = f"obj.{field.name}"
+            items.append(f"{field.alias!r}: {value}")
+        source_code = f"def render(obj):\n    return {{{', '.join(items)}}}\n"
+        exec(compile(source_code, f"<serializer {self.schema.__name__}/{source.__name__}>", "exec"), namespace)
+        return namespace["render"]
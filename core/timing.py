@@ -0,0 +1,85 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from sqlalchemy import event
+
+NAMESPACE: str = "Core Timing"
+
+class RequestTimings():
+    """
+    Phase durations in seconds and the number of SQL statements of one request.
+    """
+    __slots__ = ("phases", "queries")
+
+    def __init__(self):
+        self.phases: dict = {}
+        self.queries: int = 0
+
+
+# The current request's timings, set up by core.middleware.TimingMiddleware. The object
+# itself is shared, so time spent in copied contexts (threadpool) still lands here.
+_timings: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+
+def start_request() -> RequestTimings:
+    timings = RequestTimings()
+    _timings.set(timings)
+    return timings
+
+
+def current() -> RequestTimings | None:
+    return _timings.get()
+
+
+def record(name: str, seconds: float) -> None:
+    """
+    Add seconds to the named phase of the current request, if one is being timed.
+    """
+    timings = _timings.get()
+    if timings is not None:
+        timings.phases[name] = timings.phases.get(name, 0.0) + seconds
+
+
+def record_query(seconds: float) -> None:
+    """
+    Count one SQL statement of the current request and add it to the "db" phase.
+    """
+    timings = _timings.get()
+    if timings is not None:
+        timings.queries += 1
+        timings.phases["db"] = timings.phases.get("db", 0.0) + seconds
+
+
+@contextmanager
+def phase(name: str):
+    """
+    Context manager (or decorator) timing its body into the named phase.
+    """
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        record(name, perf_counter() - start)
+
+
+def server_timing(phases: dict, total: float) -> str:
+    """
+    Format phase durations as a Server-Timing header value in milliseconds.
+    """
+    metrics = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in phases.items()]
+    metrics.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(metrics)
+
+
+def instrument_engine(engine) -> None:
+    """
+    Time every statement run on a (sync) engine into the "db" phase.
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        record_query(perf_counter() - conn.info["query_start_time"].pop())
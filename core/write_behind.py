@@ -0,0 +1,102 @@
+import threading
+from typing import Any, Callable, Hashable
+
+from core.logging import ServerERROR
+
+NAMESPACE: str = "Core WriteBehind"
+
+
+class WriteBehindBuffer():
+    """
+    Collects writes in memory and hands them to flush_fn in batches from a
+    background thread, either every interval seconds or as soon as
+    max_batch keys are pending. Writes to the same key are coalesced so only
+    the latest value is flushed. A failed batch is kept and retried with the
+    next one. close() flushes whatever is still pending and stops the thread.
+    """
+
+    def __init__(self, flush_fn: Callable[[dict], Any], max_batch: int = 500, interval: float = 1.0):
+        self.flush_fn = flush_fn
+        self.max_batch: int = max_batch
+        self.interval: float = interval
+        self._pending: dict = {}
+        self._lock = threading.Lock()
+        # Serialises flushes between the writer thread and explicit flush() calls.
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.recorded = self.flushed = self.batches = self.failures = 0
+
+
+    def record(self, key: Hashable, value: Any) -> None:
+        """
+         Buffer value for key, replacing any value still pending for it. The
+         writer thread is started on the first call.
+        """
+        with self._lock:
+            self._pending[key] = value
+            self.recorded += 1
+            full = len(self._pending) >= self.max_batch
+            if self._thread is None and not self._closed.is_set():
+                self._thread = threading.Thread(target=self._run, name=NAMESPACE, daemon=True)
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+
+    def flush(self) -> int:
+        """
+         Write every pending entry now, in the calling thread.
+
+         Returns:
+         	 The number of entries written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            try:
+                self.flush_fn(batch)
+            except Exception as exc:
+                # Put the batch back unless a newer value was recorded meanwhile.
+                with self._lock:
+                    self._pending = {**batch, **self._pending}
+                    self.failures += 1
+                ServerERROR(NAMESPACE, f"Flushing {len(batch)} buffered writes failed", exc)
+                return 0
+            with self._lock:
+                self.flushed += len(batch)
+                self.batches += 1
+            return len(batch)
+
+
+    def close(self) -> None:
+        """
+         Stop the writer thread and flush whatever is still pending.
+        """
+        self._closed.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+            self._thread = None
+        self.flush()
+
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "recorded": self.recorded,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "failures": self.failures,
+        }
+
+
+    def _run(self) -> None:
+        while not self._closed.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
@@ -1,17 +1,25 @@
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-
-import time
+from starlette.concurrency import run_in_threadpool
 
 from auth.api.routes import router as auth_routes
+from auth.crud import LoginBuffer, RevokedTokens
+from core import metrics
+from core.admission import AdmissionMiddleware
+from core.config import OrjsonResponse
+from core.hash import hasher
+from core.middleware import TimingMiddleware
 from sql_app.api.routes import router as sql_routes
+from sql_app.database import dispose_engines
 
 NAMESPACE: str = f"Base Server"
 
 def get_application():
     _app = FastAPI(
         description="MicroService for handling Authentication",
-        version="0.3.1"
+        version="0.3.1",
+        default_response_class=OrjsonResponse
                     )
     _app.add_middleware(
         CORSMiddleware,
@@ -19,35 +27,42 @@ def get_application():
         allow_methods=["POST", "PATCH", "GET", "DELETE", "PUT", "OPTIONS"],
         allow_headers=["Access-Control-Allow-Headers", "Origin", "X-Requested-Width", "Content-Type", "Accept", "Authorization"],
     )
+    # Per-route concurrency limits; sheds with a 503 once a route's queue or deadline is exceeded.
+    _app.add_middleware(AdmissionMiddleware)
+    # Reports X-Process-Time & Server-Timing headers and handles uncaught errors.
+    _app.add_middleware(TimingMiddleware)
     return _app
 
 app = get_application()
 
 
-# Creates Header named X-Process-Time to report the time to a calls completion.
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(f"{process_time}/s")
-    return response
+@app.on_event("startup")
+async def startup():
+    # Revoked tokens are loaded before serving, so no revoked token is accepted while
+    # they load, then kept in sync in the background.
+    await run_in_threadpool(RevokedTokens.refresh)
+    RevokedTokens.start()
 
 
-# Error Handling
-@app.middleware("http")
-async def errors_handling(request: Request, call_next):
-    try:
-        return await call_next(request)
-    except KeyError:
-        raise HTTPException(status_code=404, detail="The requested resource does not exist")
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail=str(exc))
+@app.on_event("shutdown")
+async def shutdown():
+    # Buffered lastLogin writes go out before the pools are closed.
+    await run_in_threadpool(LoginBuffer.close)
+    await run_in_threadpool(RevokedTokens.close)
+    await dispose_engines()
+    hasher.close()
 
 
 @app.get("/")
 async def basic(request:Request):
     return "{'hello': 'world'}"
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheusMetrics():
+    """
+     Request, latency and database metrics in the Prometheus text format.
+    """
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 app.include_router(sql_routes)
 app.include_router(auth_routes)
@@ -2,8 +2,11 @@ from fastapi import APIRouter, HTTPException, Depends, status, Request, Body, He
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder as jEnc
 from sqlalchemy.orm import Session
-from sql_app.database import get_db, engine
-from auth import models as aModels
+from starlette.concurrency import run_in_threadpool
+from sql_app import database
+from sql_app.database import get_db
+from sql_app.migrate import audit, migrate
+from sql_app.pool import pool_status
 
 router = APIRouter(
     prefix="/db", 
@@ -22,13 +25,45 @@ async def get_sql_app(res=JSONResponse, req=Request, db: Session = Depends(get_d
         raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, f"{jEnc(e)}")
     
 
-@router.post("/create_tables")
-async def createTables(req:Request, db: Session= Depends(get_db)):
+@router.get("/pool")
+async def poolStats(req: Request):
+    """
+     Report the connection pool's live state and counters: checkouts, wait time,
+     overflow use, timeouts and invalidations for the sync and asyncio engines and their replicas.
+    """
+    content = {"data": {"sync": pool_status(database.engine), "async": pool_status(database.async_engine),
+                        "replicas": [pool_status(_engine) for _engine in database.replica_engines],
+                        "async_replicas": [pool_status(_engine) for _engine in database.async_replica_engines]}}
+    return JSONResponse(content, status.HTTP_200_OK)
+
+
+@router.post("/migrate")
+async def migrateSchema(req: Request):
+    """
+     Apply every pending schema migration, see sql_app.migrate.
+    """
+    try:
+        applied = await run_in_threadpool(migrate)
+        return JSONResponse({"data": {"applied": applied}}, status.HTTP_201_CREATED)
+    except Exception as e:
+        raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, str(e))
+
+
+@router.get("/audit")
+async def auditSchema(req: Request):
+    """
+     Report redundant indexes and hot lookups without an index, see sql_app.schema_audit.
+    """
+    return JSONResponse({"data": await run_in_threadpool(audit)}, status.HTTP_200_OK)
+
+
+@router.post("/create_tables", deprecated=True)
+async def createTables(req:Request):
+    """
+     Kept for existing clients; applies the schema migrations like /db/migrate.
+    """
     try:
-        aModels.User.metadata.create_all(engine)
-        aModels.Profile.metadata.create_all(engine)
-        aModels.Address.metadata.create_all(engine)
-        aModels.CountryCode.metadata.create_all(engine)
+        await run_in_threadpool(migrate)
         content = {"success" : "Tables created successfully! within Mysql Cloud Database."}
         return JSONResponse(content, status.HTTP_201_CREATED)
     except Exception as e:
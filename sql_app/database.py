@@ -1,16 +1,78 @@
+import time
+from itertools import cycle
+from math import ceil
+
 import sqlalchemy
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base, DeclarativeMeta
 from sqlalchemy.orm import sessionmaker
 
+from core import timing
 from core.config import settings
+from sql_app.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument_pool
 
 NAMESPACE: str = "SQL_APP/Database"
 
-engine = create_engine(url=settings.DB_URL, echo=False)
+
+def engine_kwargs(url: str, is_async: bool = False) -> dict:
+    """
+     Pool configuration from Settings, on an instrumented pool class.
+    """
+    kwargs = {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    # SQLite connections are handed between the event loop and the threadpool.
+    if url.startswith("sqlite") and not is_async:
+        kwargs["connect_args"] = {"check_same_thread": False}
+    return kwargs
+
+
+engine = create_engine(url=settings.DB_URL, echo=False, **engine_kwargs(settings.DB_URL))
+
+timing.instrument_engine(engine)
+instrument_pool(engine)
 
 SessionCloud = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The asyncio engine is only built when enabled so the async driver stays optional.
+async_engine = create_async_engine(
+    settings.DB_ASYNC_URL, echo=False, **engine_kwargs(settings.DB_ASYNC_URL, is_async=True)) if settings.DB_ASYNC else None
+
+AsyncSessionCloud = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False,
+    bind=async_engine, class_=AsyncSession) if settings.DB_ASYNC else None
+
+if async_engine is not None:
+    timing.instrument_engine(async_engine.sync_engine)
+    instrument_pool(async_engine.sync_engine)
+
+# Read replicas, taken in turn by read sessions; empty when none are configured.
+replica_engines: list = [
+    create_engine(url=url, echo=False, **engine_kwargs(url)) for url in settings.DB_REPLICA_URLS]
+async_replica_engines: list = [
+    create_async_engine(url, echo=False, **engine_kwargs(url, is_async=True))
+    for url in settings.DB_ASYNC_REPLICA_URLS] if settings.DB_ASYNC else []
+
+for _engine in replica_engines + [_engine.sync_engine for _engine in async_replica_engines]:
+    timing.instrument_engine(_engine)
+    instrument_pool(_engine)
+
+_replica_clouds = cycle([sessionmaker(autocommit=False, autoflush=False, bind=_engine)
+                         for _engine in replica_engines]) if replica_engines else None
+_async_replica_clouds = cycle([
+    sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=_engine, class_=AsyncSession)
+    for _engine in async_replica_engines]) if async_replica_engines else None
+
+# Cookie carrying the time of the client's last write, so its reads stay on the primary for
+# DB_READ_YOUR_WRITES seconds whichever worker or instance serves them.
+LAST_WRITE_COOKIE: str = "LastWrite"
+
 Base: DeclarativeMeta = declarative_base()
 
 def get_db():
@@ -19,3 +81,73 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionCloud() as db:
+        yield db
+
+
+# Dependency used by the auth routes; DB_ASYNC selects the AsyncSession path.
+get_session = get_async_db if settings.DB_ASYNC else get_db
+
+
+def has_replicas(is_async: bool = settings.DB_ASYNC) -> bool:
+    return (_async_replica_clouds if is_async else _replica_clouds) is not None
+
+
+def mark_write(response) -> None:
+    """
+     Record on response, in the LAST_WRITE_COOKIE, that its client just wrote to the
+     primary, so the client's reads see the write until DB_READ_YOUR_WRITES has passed
+     and the replicas have caught up. Nothing is set when no replica is configured.
+    """
+    if has_replicas() and settings.DB_READ_YOUR_WRITES > 0:
+        response.set_cookie(key=LAST_WRITE_COOKIE, value=f"{time.time():.3f}",
+                            max_age=ceil(settings.DB_READ_YOUR_WRITES), httponly=True, samesite="lax")
+
+
+def wrote_recently(last_write: str | None) -> bool:
+    """
+     Whether a LAST_WRITE_COOKIE value is within the last DB_READ_YOUR_WRITES seconds.
+    """
+    try:
+        elapsed = time.time() - float(last_write)
+    except (TypeError, ValueError):
+        return False
+    # Either way, to allow for the clocks of different instances.
+    return abs(elapsed) < settings.DB_READ_YOUR_WRITES
+
+
+def read_session_cloud(primary: bool = False, is_async: bool = settings.DB_ASYNC):
+    """
+     The session factory for a read-only session: the next replica, or the
+     primary when no replica is configured or primary is set.
+    """
+    clouds = _async_replica_clouds if is_async else _replica_clouds
+    if clouds is None or primary:
+        return AsyncSessionCloud if is_async else SessionCloud
+    return next(clouds)
+
+
+def get_read_db(primary: bool = False):
+    db = read_session_cloud(primary, is_async=False)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(primary: bool = False):
+    async with read_session_cloud(primary, is_async=True)() as db:
+        yield db
+
+
+async def dispose_engines():
+    """
+     Close every pooled connection, called when the App shuts down.
+    """
+    for _engine in ([async_engine] if async_engine is not None else []) + async_replica_engines:
+        await _engine.dispose()
+    for _engine in [engine] + replica_engines:
+        _engine.dispose()
@@ -0,0 +1,132 @@
+"""
+Versioned schema migrations.
+
+Migrations are the modules of sql_app/migrations named NNNN_<name>.py, each
+with a DESCRIPTION and an upgrade(connection) function. They are applied in
+order, each within its own transaction, and recorded in schema_migrations so
+every one runs once per database. Each upgrade spells out its own DDL, naming
+the tables & indexes it touches, so it never changes meaning as the models do.
+Upgrades are written to be idempotent, as some backends (MySQL) can't roll DDL
+back.
+
+    python -m sql_app.migrate            apply pending migrations
+    python -m sql_app.migrate --status   list applied and pending migrations
+    python -m sql_app.migrate --audit    report redundant and missing indexes
+"""
+import argparse
+import importlib
+import json
+import os
+import re
+import sys
+from typing import NamedTuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, insert, select
+
+from core.logging import ServerINFO
+from sql_app import database
+from sql_app.schema_audit import audit_indexes
+
+NAMESPACE: str = "SQL_APP/Migrate"
+
+MIGRATIONS_DIR: str = os.path.join(os.path.dirname(__file__), "migrations")
+
+schema_migrations = Table(
+    "schema_migrations", MetaData(),
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("description", String(length=255), nullable=False),
+    Column("applied_at", DateTime, server_default=func.now(), nullable=False),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    upgrade: object
+
+
+def discover() -> list[Migration]:
+    """
+     The migrations within sql_app/migrations, ordered by version.
+    """
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = re.fullmatch(r"(\d{4})_\w+\.py", filename)
+        if not match:
+            continue
+        module = importlib.import_module(f"sql_app.migrations.{filename[:-3]}")
+        migrations.append(Migration(int(match.group(1)), module.DESCRIPTION, module.upgrade))
+    return migrations
+
+
+def applied_versions(connection) -> set:
+    schema_migrations.create(connection, checkfirst=True)
+    return set(connection.execute(select(schema_migrations.c.version)).scalars())
+
+
+def migrate(engine=None, target: int = None) -> list[dict]:
+    """
+     Apply every pending migration up to target (all by default).
+
+     Args:
+     	 engine: the engine to migrate, the App's primary engine by default
+     	 target: the last version to apply
+
+     Returns:
+     	 The version & description of each migration applied, empty when up to date.
+    """
+    engine = database.engine if engine is None else engine
+    with engine.begin() as connection:
+        applied = applied_versions(connection)
+    done = []
+    for migration in discover():
+        if migration.version in applied or (target is not None and migration.version > target):
+            continue
+        with engine.begin() as connection:
+            migration.upgrade(connection)
+            connection.execute(insert(schema_migrations).values(
+                version=migration.version, description=migration.description))
+        ServerINFO(NAMESPACE, f"Applied migration {migration.version:04d}: {migration.description}")
+        done.append({"version": migration.version, "description": migration.description})
+    return done
+
+
+def status(engine=None) -> list[dict]:
+    engine = database.engine if engine is None else engine
+    with engine.begin() as connection:
+        applied = applied_versions(connection)
+    return [{"version": migration.version, "description": migration.description,
+             "applied": migration.version in applied} for migration in discover()]
+
+
+def audit(engine=None) -> dict:
+    engine = database.engine if engine is None else engine
+    with engine.connect() as connection:
+        return audit_indexes(connection)
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--status", action="store_true", help="list applied and pending migrations")
+    parser.add_argument("--audit", action="store_true", help="report redundant and missing indexes")
+    parser.add_argument("--target", type=int, default=None, help="last migration version to apply")
+    args = parser.parse_args(argv)
+
+    if args.audit:
+        findings = audit()
+        print(json.dumps(findings, indent=2))
+        return 1 if findings["redundant"] or findings["missing"] else 0
+    if args.status:
+        for migration in status():
+            print(f"{migration['version']:04d} {'applied' if migration['applied'] else 'pending':8} {migration['description']}")
+        return 0
+    done = migrate(target=args.target)
+    for migration in done:
+        print(f"applied {migration['version']:04d} {migration['description']}")
+    if not done:
+        print("schema is up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""
+Create the initial schema: users, user_profiles, address_book & country_code
+as first released. Tables that already exist are left as they are.
+"""
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, MetaData, String, Table, func
+
+DESCRIPTION: str = "Initial schema"
+
+metadata = MetaData()
+
+Table(
+    "users", metadata,
+    Column("pk", Integer, primary_key=True, index=True, nullable=False),
+    Column("UUID", String(length=41), unique=True, nullable=False),
+    Column("email", String(length=255), unique=True, index=True, nullable=False),
+    Column("username", String(length=256), unique=True, index=True, nullable=False),
+    Column("password", String(length=64), nullable=False),
+    Column("isAdmin", Boolean, nullable=True),
+    Column("verified", Boolean, nullable=False),
+    Column("dateJoined", DateTime(timezone=True), server_default=func.now(), nullable=False),
+    Column("lastLogin", DateTime),
+)
+
+Table(
+    "user_profiles", metadata,
+    Column("pk", Integer, primary_key=True, index=True, nullable=False),
+    Column("user_pk", Integer, ForeignKey("users.pk", ondelete="CASCADE")),
+    Column("firstName", String(length=20), index=True),
+    Column("lastName", String(length=35), index=True),
+    Column("stripe_Cust_ID", String(length=50), nullable=True),
+    Column("One_click_Purchasing", Boolean),
+)
+
+Table(
+    "address_book", metadata,
+    Column("pk", Integer, primary_key=True, index=True, nullable=False),
+    Column("profile_pk", Integer, ForeignKey("user_profiles.pk", ondelete="CASCADE")),
+    Column("streetNumber", Integer),
+    Column("streetName", String(length=100)),
+    Column("aptNumber", String(length=10)),
+    Column("zipCode", Integer),
+    Column("city", String(length=25)),
+    Column("state", String(length=25)),
+)
+
+Table(
+    "country_code", metadata,
+    Column("pk", Integer, primary_key=True, index=True, nullable=False),
+    Column("address_pk", Integer, ForeignKey("address_book.pk")),
+    Column("alpha3", String(length=3), unique=True, nullable=False),
+    Column("title", String(length=25), unique=True, nullable=False),
+)
+
+
+def upgrade(connection) -> None:
+    metadata.create_all(connection, checkfirst=True)
@@ -0,0 +1,13 @@
+"""
+Add users.version, bumped on login & profile patches and used for ETags,
+to databases created before the column existed.
+"""
+from sqlalchemy import inspect, text
+
+DESCRIPTION: str = "Add users.version"
+
+
+def upgrade(connection) -> None:
+    columns = {column["name"] for column in inspect(connection).get_columns("users")}
+    if "version" not in columns:
+        connection.execute(text("ALTER TABLE users ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
@@ -0,0 +1,15 @@
+"""
+Drop the primary key indexes, which duplicate the primary keys, and index
+the foreign keys the user graph is loaded by.
+"""
+from sql_app.migrations import create_index, drop_index
+
+DESCRIPTION: str = "Drop redundant indexes and add missing lookup indexes"
+
+
+def upgrade(connection) -> None:
+    for table in ("users", "user_profiles", "address_book", "country_code"):
+        drop_index(connection, f"ix_{table}_pk", table)
+    create_index(connection, "ix_user_profiles_user_pk", "user_profiles", ("user_pk",))
+    create_index(connection, "ix_address_book_profile_pk", "address_book", ("profile_pk",))
+    create_index(connection, "ix_country_code_address_pk", "country_code", ("address_pk",))
@@ -0,0 +1,18 @@
+"""
+Add revoked_tokens, the persisted side of the token revocation store.
+"""
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func
+
+DESCRIPTION: str = "Add revoked_tokens"
+
+revoked_tokens = Table(
+    "revoked_tokens", MetaData(),
+    Column("pk", Integer, primary_key=True, nullable=False),
+    Column("jti", String(length=64), unique=True, nullable=False),
+    Column("expires", DateTime, nullable=False),
+    Column("revokedAt", DateTime(timezone=True), server_default=func.now(), nullable=False),
+)
+
+
+def upgrade(connection) -> None:
+    revoked_tokens.create(connection, checkfirst=True)
@@ -0,0 +1,20 @@
+"""
+Add address_book.externalRef and the unique (profile_pk, externalRef) index
+the address upserts conflict on. The index also serves a profile's address
+lookups, so the profile_pk index from 0003 is dropped.
+"""
+from sqlalchemy import inspect, text
+
+from sql_app.migrations import create_index, drop_index
+
+DESCRIPTION: str = "Add address_book.externalRef"
+
+
+def upgrade(connection) -> None:
+    columns = {column["name"] for column in inspect(connection).get_columns("address_book")}
+    if "externalRef" not in columns:
+        column = connection.dialect.identifier_preparer.quote("externalRef")
+        connection.execute(text(f"ALTER TABLE address_book ADD COLUMN {column} VARCHAR(64)"))
+    create_index(connection, "ux_address_book_profile_pk_externalRef", "address_book",
+                 ("profile_pk", "externalRef"), unique=True)
+    drop_index(connection, "ix_address_book_profile_pk", "address_book")
@@ -0,0 +1,10 @@
+"""
+Index revoked_tokens.revokedAt, which the revoked token syncs select by.
+"""
+from sql_app.migrations import create_index
+
+DESCRIPTION: str = "Index revoked_tokens.revokedAt"
+
+
+def upgrade(connection) -> None:
+    create_index(connection, "ix_revoked_tokens_revokedAt", "revoked_tokens", ("revokedAt",))
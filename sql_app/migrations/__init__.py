@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Index, Integer, MetaData, Table, inspect
+
+NAMESPACE: str = "SQL_APP/Migrations"
+
+
+def _index_table(table: str, columns: tuple) -> Table:
+    # A stand-in Table carrying just the named columns, enough to emit index DDL.
+    return Table(table, MetaData(), *(Column(column, Integer) for column in columns))
+
+
+def index_names(connection, table: str) -> set:
+    return {index["name"] for index in inspect(connection).get_indexes(table)}
+
+
+def create_index(connection, name: str, table: str, columns: tuple, unique: bool = False) -> None:
+    """
+     Create the named index on table unless it already exists.
+    """
+    if name not in index_names(connection, table):
+        stand_in = _index_table(table, columns)
+        Index(name, *(stand_in.c[column] for column in columns), unique=unique).create(connection)
+
+
+def drop_index(connection, name: str, table: str) -> None:
+    """
+     Drop the named index from table if it exists.
+    """
+    if name in index_names(connection, table):
+        stand_in = _index_table(table, ("_",))
+        Index(name, stand_in.c["_"]).drop(connection)
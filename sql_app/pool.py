@@ -0,0 +1,122 @@
+import threading
+from time import perf_counter
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+NAMESPACE: str = "SQL_APP/Pool"
+
+
+class PoolStats():
+    """
+    Counters for one connection pool: checkouts and the time spent waiting for
+    them, timeouts, checkouts served from overflow connections, and
+    invalidations. Used to tell pool starvation apart from slow queries.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = self.checkins = self.connects = 0
+        self.timeouts = self.invalidations = 0
+        self.overflow_checkouts = self.overflow_max = 0
+        self.wait_total = self.wait_max = 0.0
+
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+
+    def as_dict(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "connects": self.connects,
+            "timeouts": self.timeouts,
+            "invalidations": self.invalidations,
+            "overflow_checkouts": self.overflow_checkouts,
+            "overflow_max": self.overflow_max,
+            "wait_total_ms": round(self.wait_total * 1000, 3),
+            "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+        }
+
+
+class InstrumentedPool():
+    """
+    Mixin timing Pool.connect, i.e. how long a caller waited to be handed a
+    connection, and counting checkout timeouts. The stats survive a recreate.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats: PoolStats = PoolStats()
+
+
+    def connect(self):
+        start = perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            self.stats.record_wait(perf_counter() - start)
+
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+    def status_dict(self) -> dict:
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "timeout": self.timeout(),
+            **self.stats.as_dict(),
+        }
+
+
+class InstrumentedQueuePool(InstrumentedPool, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_pool(engine) -> None:
+    """
+    Count checkouts, checkins, new connections, overflow use and invalidations
+    on the engine's InstrumentedPool. Listeners carry over a pool recreate.
+    """
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        engine.pool.stats.connects += 1
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        stats: PoolStats = engine.pool.stats
+        stats.checkouts += 1
+        overflow = engine.pool.overflow()
+        if overflow > 0:
+            stats.overflow_checkouts += 1
+            stats.overflow_max = max(stats.overflow_max, overflow)
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        engine.pool.stats.checkins += 1
+
+    @event.listens_for(engine, "invalidate")
+    def _invalidate(dbapi_connection, connection_record, exception):
+        engine.pool.stats.invalidations += 1
+
+
+def pool_status(engine) -> dict | None:
+    pool = engine.pool if engine is not None else None
+    return pool.status_dict() if isinstance(pool, InstrumentedPool) else None
@@ -0,0 +1,114 @@
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+from sqlalchemy import event
+
+NAMESPACE: str = "SQL_APP/Query Budget"
+
+
+def query_budget(statements: int):
+    """
+    Declare the maximum number of SQL statements a route may issue per request.
+    Apply it beneath the router decorator:
+
+        @router.post("/register")
+        @query_budget(3)
+        async def Register(...): ...
+
+    The budget is read by assert_route_query_budget and, in DEBUG, by the
+    TimingMiddleware which logs a warning when a request goes over it.
+    """
+    def decorator(endpoint):
+        endpoint.query_budget = statements
+        return endpoint
+    return decorator
+
+
+class QueryCounter():
+    """
+    Statements, and the time spent on them, seen on the counted engines.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count: int = 0
+        self.seconds: float = 0.0
+        self.statements: list = []
+
+
+    def record(self, statement: str, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(*engines):
+    """
+    Count every statement executed on the given engines, by default the App's
+    sync and asyncio engines and their read replicas, from any thread while the
+    block runs. Listeners are only attached for the duration of the block.
+
+        with count_queries() as counter:
+            client.get("/auth/protected")
+        assert counter.count == 1
+    """
+    if not engines:
+        from sql_app import database
+        engines = tuple(_engine.sync_engine if hasattr(_engine, "sync_engine") else _engine
+                        for _engine in (database.engine, *database.replica_engines,
+                                        database.async_engine, *database.async_replica_engines)
+                        if _engine is not None)
+    counter = QueryCounter()
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_counter_start", []).append(perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter.record(statement, perf_counter() - conn.info["query_counter_start"].pop())
+
+    for _engine in engines:
+        event.listen(_engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(_engine, "after_cursor_execute", after_cursor_execute)
+    try:
+        yield counter
+    finally:
+        for _engine in engines:
+            event.remove(_engine, "before_cursor_execute", before_cursor_execute)
+            event.remove(_engine, "after_cursor_execute", after_cursor_execute)
+
+
+def route_query_budget(app, method: str, path: str) -> int | None:
+    """
+    The query budget declared on the route of app that serves method & path.
+    """
+    from starlette.routing import Match
+
+    scope = {"type": "http", "method": method.upper(), "path": path}
+    for route in app.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(getattr(route, "endpoint", None), "query_budget", None)
+    return None
+
+
+def assert_route_query_budget(client, method: str, path: str, **kwargs):
+    """
+    Test helper: send a request through a TestClient and fail when the route
+    issues more statements than its declared query_budget.
+
+        res = assert_route_query_budget(client, "POST", "/auth/register", json=payload)
+
+    Returns:
+    	 The response, for further assertions.
+    """
+    budget = route_query_budget(client.app, method, path)
+    assert budget is not None, f"{method} {path} has no declared query budget"
+    with count_queries() as counter:
+        response = client.request(method, path, **kwargs)
+    assert counter.count <= budget, (
+        f"{method} {path} issued {counter.count} SQL statements, over its budget of {budget}:\n"
+        + "\n".join(counter.statements))
+    return response
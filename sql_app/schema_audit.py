@@ -0,0 +1,91 @@
+from sqlalchemy import inspect
+
+from sql_app.database import Base
+
+NAMESPACE: str = "SQL_APP/Schema Audit"
+
+# Lookups on the request path, as (table, leading columns, unique); each needs an index.
+#   users by username & email for login, the profile by user_pk, addresses by
+#   profile_pk and country codes by address_pk for the user graph loads, and
+#   revocations by revokedAt for the revoked token syncs.
+HOT_LOOKUPS: tuple = (
+    ("users", ("username",), True),
+    ("users", ("email",), True),
+    ("user_profiles", ("user_pk",), False),
+    ("address_book", ("profile_pk",), False),
+    ("country_code", ("address_pk",), False),
+    ("revoked_tokens", ("revokedAt",), False),
+)
+
+
+def _table_keys(inspector, table: str) -> list:
+    """
+     Every index-backed key of table as (name, columns, unique, droppable):
+     the primary key, unique constraints and plain or unique indexes. Only
+     indexes are droppable; constraints are left to the models.
+    """
+    keys = []
+    primary = inspector.get_pk_constraint(table)
+    if primary.get("constrained_columns"):
+        keys.append(("PRIMARY", tuple(primary["constrained_columns"]), True, False))
+    for constraint in inspector.get_unique_constraints(table):
+        keys.append((constraint["name"], tuple(constraint["column_names"]), True, False))
+    for index in sorted(inspector.get_indexes(table), key=lambda index: index["name"] or ""):
+        # Reflected twice on some backends; the constraint entry already covers it.
+        if index.get("duplicates_constraint"):
+            continue
+        keys.append((index["name"], tuple(index["column_names"]), bool(index["unique"]), True))
+    return keys
+
+
+def _covers(columns: tuple, unique: bool, other_columns: tuple, other_unique: bool) -> bool:
+    # other makes an index on columns redundant: columns lead other, and uniqueness is kept.
+    if other_columns[:len(columns)] != columns:
+        return False
+    return not unique or (other_unique and other_columns == columns)
+
+
+def audit_indexes(connection) -> dict:
+    """
+     Find redundant and missing indexes on the App's own tables, those of Base.metadata.
+     An index is redundant when the primary key, a unique constraint or another index
+     starts with the same columns (and keeps its uniqueness); of two identical indexes
+     the first by name is kept. The audit only reports; migrations do the fixing.
+     A hot lookup is missing an index when no key starts with its columns.
+
+     Args:
+     	 connection: connection to the database to audit
+
+     Returns:
+     	 {"redundant": [...], "missing": [...]}, each entry naming the table, index
+       and columns concerned.
+    """
+    # Registers the App's tables on Base.metadata; other tables in the database are never audited.
+    from auth import models
+    inspector = inspect(connection)
+    tables = set(inspector.get_table_names()) & set(Base.metadata.tables)
+    redundant, missing = [], []
+    for table in sorted(tables):
+        keys = _table_keys(inspector, table)
+        for position, (name, columns, unique, droppable) in enumerate(keys):
+            if not droppable:
+                continue
+            for other_position, (other, other_columns, other_unique, _) in enumerate(keys):
+                if other_position == position or not _covers(columns, unique, other_columns, other_unique):
+                    continue
+                # Identical droppable indexes: only the later ones are redundant.
+                if other_columns == columns and other_unique == unique and keys[other_position][3] \
+                        and other_position > position:
+                    continue
+                redundant.append({"table": table, "index": name, "columns": list(columns),
+                                  "reason": f"covered by {other} ({', '.join(other_columns)})"})
+                break
+    for table, columns, unique in HOT_LOOKUPS:
+        if table not in tables:
+            continue
+        keys = _table_keys(inspector, table)
+        if not any(key_columns[:len(columns)] == columns for _, key_columns, _, _ in keys):
+            missing.append({"table": table, "index": f"ix_{table}_{'_'.join(columns)}",
+                            "columns": list(columns), "unique": unique})
+    return {"redundant": redundant, "missing": missing}
+
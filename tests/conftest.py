@@ -0,0 +1,80 @@
+"""
+Shared fixtures: the App served by a TestClient against a throwaway SQLite
+database migrated to the latest schema. The settings are read at import, so
+the environment is set before main is imported.
+"""
+import os
+import shutil
+import tempfile
+from itertools import count
+
+import pytest
+
+_DB_DIR: str = tempfile.mkdtemp(prefix="auth-tests-")
+os.environ.update({
+    "DB_URL": f"sqlite:///{_DB_DIR}/tests.db",
+    "DB_ASYNC_URL": f"sqlite+aiosqlite:///{_DB_DIR}/tests.db",
+    "DB_ASYNC": "false",
+    "DB_REPLICA_URLS": "",
+    "DB_ASYNC_REPLICA_URLS": "",
+    "LOG_LEVEL": "WARNING",
+    # No background thread may issue statements while a test is counting them.
+    "LAST_LOGIN_WRITE_BEHIND": "false",
+    "REVOCATION_SYNC_INTERVAL": "0",
+})
+
+from fastapi.testclient import TestClient
+
+import main
+from auth import crud
+from sql_app.migrate import migrate
+
+NAMESPACE: str = "Tests"
+
+_usernames = count()
+
+
+@pytest.fixture(scope="session")
+def app():
+    migrate()
+    yield main.app
+    shutil.rmtree(_DB_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    with TestClient(app) as _client:
+        yield _client
+
+
+@pytest.fixture(autouse=True)
+def cold_caches():
+    # Every test sees the statements of a request whose user & token aren't cached yet.
+    crud.UserCache.clear()
+    crud.TokenCache.clear()
+    yield
+
+
+def login(client, username: str, password: str = "password") -> dict:
+    """
+     Log username in and return the headers authenticating as them. The cookie set by
+     /auth/token is dropped so every request authenticates with the returned header.
+    """
+    res = client.post("/auth/token", json={"username": username, "password": password}, allow_redirects=False)
+    assert res.status_code == 302, res.text
+    client.cookies.clear()
+    return {"Authorization": res.json()["data"]["token"]}
+
+
+@pytest.fixture
+def new_user(client):
+    """
+     Register a new user and return their username & authorization headers.
+    """
+    def register() -> tuple[str, dict]:
+        username = f"user{next(_usernames)}"
+        res = client.post("/auth/register", json={"email": f"{username}@example.com", "username": username,
+                                                  "psw": "password", "re_psw": "password"})
+        assert res.status_code == 201, res.text
+        return username, login(client, username)
+    return register
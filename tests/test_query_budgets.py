@@ -0,0 +1,89 @@
+"""
+Every route carrying a @query_budget, sent its worst case through
+assert_route_query_budget: cold caches, and the largest batch the route accepts.
+"""
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from auth.models import Profile as ProfileModel, User as UserModel
+from core.config import settings
+from sql_app import database
+from sql_app.query_budget import assert_route_query_budget
+
+
+def register(client, new_user):
+    username = f"budget{uuid4().hex[:12]}"
+    return {"json": {"email": f"{username}@example.com", "username": username,
+                     "psw": "password", "re_psw": "password"}}
+
+
+def token(client, new_user):
+    username, _ = new_user()
+    client.cookies.clear()
+    return {"json": {"username": username, "password": "password"}, "allow_redirects": False}
+
+
+def authenticated(client, new_user):
+    _, headers = new_user()
+    return {"headers": headers}
+
+
+def users_all(client, new_user):
+    # A full page of users with profiles, so the addresses are selected in for USERS_PAGE_MAX + 1 of them.
+    _, headers = new_user()
+    with database.engine.begin() as connection:
+        missing = settings.USERS_PAGE_MAX + 1 - connection.execute(select(func.count()).select_from(UserModel)).scalar()
+        for n in range(max(missing, 0)):
+            pk = connection.execute(insert(UserModel).values(
+                UUID=str(uuid4()), email=f"seed{n}@example.com", username=f"seed{n}", password="x")).inserted_primary_key[0]
+            connection.execute(insert(ProfileModel).values(user_pk=pk))
+    return {"headers": headers, "params": {"limit": settings.USERS_PAGE_MAX}}
+
+
+def retrieve_users(client, new_user):
+    _, headers = new_user()
+    UUIDs = [str(uuid4()) for _ in range(settings.USERS_LOOKUP_MAX)]
+    return {"headers": headers, "json": {"UUIDs": UUIDs}}
+
+
+def patch_profile(client, new_user):
+    _, headers = new_user()
+    return {"headers": headers, "json": {"firstName": "Ada", "lastName": "Lovelace"}}
+
+
+def upsert_addresses(client, new_user):
+    _, headers = new_user()
+    addresses = [{"externalRef": f"crm-{n}", "streetNumber": n, "streetName": "Main St", "city": "Springfield"}
+                 for n in range(settings.ADDRESSES_UPSERT_MAX)]
+    return {"headers": headers, "json": addresses}
+
+
+RECIPES: dict = {
+    ("POST", "/auth/register"): register,
+    ("POST", "/auth/token"): token,
+    ("GET", "/auth/protected"): authenticated,
+    ("POST", "/auth/logout"): authenticated,
+    ("GET", "/auth/retrieve_user"): authenticated,
+    ("GET", "/auth/retrieve_user/all"): authenticated,
+    ("GET", "/auth/users_all"): users_all,
+    ("POST", "/auth/retrieve_users"): retrieve_users,
+    ("PATCH", "/auth/patch_profile"): patch_profile,
+    ("GET", "/auth/addresses"): authenticated,
+    ("PUT", "/auth/addresses"): upsert_addresses,
+}
+
+
+def test_every_budgeted_route_has_a_recipe(app):
+    budgeted = {(method, route.path) for route in app.routes
+                if getattr(getattr(route, "endpoint", None), "query_budget", None) is not None
+                for method in route.methods}
+    assert budgeted == set(RECIPES)
+
+
+@pytest.mark.parametrize("method, path", list(RECIPES), ids=[f"{method} {path}" for method, path in RECIPES])
+def test_route_stays_within_its_query_budget(client, new_user, cold_caches, method, path):
+    kwargs = RECIPES[method, path](client, new_user)
+    res = assert_route_query_budget(client, method, path, **kwargs)
+    assert res.status_code < 400, res.text
@@ -0,0 +1,75 @@
+"""
+RevocationStore syncs: each refresh re-reads the overlap window, so a revocation
+committed after a later one was loaded is still picked up, and tokens are refused
+until a load has succeeded.
+"""
+from datetime import datetime, timedelta
+
+from auth import crud
+from core.revocation import RevocationStore
+
+START = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def store(rows: list, overlap: float = 60.0) -> tuple:
+    calls = []
+
+    def loader(since):
+        calls.append(since)
+        return [row for row in rows if since is None or row[0] >= since]
+    return RevocationStore(loader, interval=0, overlap=overlap, timer=lambda: 0), calls
+
+
+def test_first_refresh_loads_every_revocation():
+    revocations, calls = store([(START, "a", 10), (START + timedelta(seconds=5), "b", 10)])
+    assert revocations.refresh() == 2
+    assert calls == [None]
+    assert "a" in revocations and "b" in revocations
+    assert revocations.cursor == START + timedelta(seconds=5)
+
+
+def test_refresh_rereads_the_overlap_window():
+    rows = [(START + timedelta(seconds=30), "later", 10)]
+    revocations, calls = store(rows, overlap=60)
+    revocations.refresh()
+    # Recorded before "later" but committed after it was synced.
+    rows.append((START, "late", 10))
+    assert revocations.refresh() == 1
+    assert calls[-1] == START - timedelta(seconds=30)
+    assert "late" in revocations
+    assert revocations.stats()["loaded"] == 2
+
+
+def test_refresh_drops_expired_revocations():
+    revocations, _ = store([(START, "expired", -1), (START, "live", 10)])
+    revocations.refresh()
+    assert "expired" not in revocations and "live" in revocations
+
+
+def test_ready_once_a_load_succeeds():
+    failing = True
+
+    def loader(since):
+        if failing:
+            raise ConnectionError("database unavailable")
+        return []
+    revocations = RevocationStore(loader, interval=0, timer=lambda: 0)
+    assert revocations.refresh() == 0
+    assert not revocations.ready and revocations.stats()["failures"] == 1
+    failing = False
+    revocations.refresh()
+    assert revocations.ready
+
+
+def test_tokens_are_refused_until_the_revocations_load(client, new_user, monkeypatch):
+    _, headers = new_user()
+
+    def unavailable(since):
+        raise ConnectionError("database unavailable")
+    monkeypatch.setattr(crud.RevokedTokens, "syncs", 0)
+    monkeypatch.setattr(crud.RevokedTokens, "loader", unavailable)
+    assert client.get("/auth/protected", headers=headers).status_code == 503
+    monkeypatch.undo()
+    monkeypatch.setattr(crud.RevokedTokens, "syncs", 0)
+    assert client.get("/auth/protected", headers=headers).status_code == 200
+    assert crud.RevokedTokens.ready
@@ -0,0 +1,83 @@
+"""
+The SQL each read route emits, asserted statement by statement so a relationship
+that falls back to lazy loading, or a query that reappears, fails here first.
+"""
+import re
+
+from sql_app.query_budget import count_queries
+
+
+def statements(client, method: str, path: str, headers: dict) -> list:
+    with count_queries() as counter:
+        res = client.request(method, path, headers=headers)
+    assert res.status_code < 300, res.text
+    return [" ".join(statement.split()) for statement in counter.statements]
+
+
+def tables(statement: str) -> list:
+    return re.findall(r"(?:FROM|JOIN) (\w+)", statement)
+
+
+def test_protected_loads_the_user_alone(client, new_user):
+    _, headers = new_user()
+    emitted = statements(client, "GET", "/auth/protected", headers)
+    assert len(emitted) == 1
+    assert emitted[0].startswith("SELECT users.pk")
+    assert tables(emitted[0]) == ["users"]
+    assert "WHERE users.username = ?" in emitted[0]
+
+
+def test_protected_is_served_from_the_user_cache(client, new_user):
+    _, headers = new_user()
+    statements(client, "GET", "/auth/protected", headers)
+    assert statements(client, "GET", "/auth/protected", headers) == []
+
+
+def test_logout_loads_the_user_and_records_the_revocation(client, new_user):
+    _, headers = new_user()
+    emitted = statements(client, "POST", "/auth/logout", headers)
+    assert len(emitted) == 2
+    assert tables(emitted[0]) == ["users"]
+    assert emitted[1].startswith("INSERT INTO revoked_tokens")
+    # The revoked token is refused without another query.
+    with count_queries() as counter:
+        res = client.get("/auth/protected", headers=headers)
+    assert res.status_code == 401
+    assert counter.count == 0
+
+
+def test_retrieve_user_joins_the_profile(client, new_user):
+    _, headers = new_user()
+    emitted = statements(client, "GET", "/auth/retrieve_user", headers)
+    assert len(emitted) == 1
+    assert tables(emitted[0]) == ["users", "user_profiles"]
+    assert "LEFT OUTER JOIN user_profiles" in emitted[0]
+
+
+def test_retrieve_user_all_selects_the_addresses_in(client, new_user):
+    _, headers = new_user()
+    emitted = statements(client, "GET", "/auth/retrieve_user/all", headers)
+    assert len(emitted) == 2
+    assert tables(emitted[0]) == ["users", "user_profiles"]
+    assert tables(emitted[1]) == ["address_book", "country_code"]
+    assert "WHERE address_book.profile_pk IN (?)" in emitted[1]
+
+
+def test_users_all_loads_a_page_then_its_relationships(client, new_user):
+    new_user()
+    _, headers = new_user()
+    emitted = statements(client, "GET", "/auth/users_all", headers)
+    assert len(emitted) == 2
+    assert tables(emitted[0]) == ["users", "user_profiles"]
+    assert "ORDER BY users.pk" in emitted[0] and "LIMIT ?" in emitted[0]
+    assert tables(emitted[1]) == ["address_book", "country_code"]
+    assert "WHERE address_book.profile_pk IN (" in emitted[1]
+
+
+def test_users_all_joins_the_countries_of_many_addresses(client, new_user):
+    _, headers = new_user()
+    addresses = [{"externalRef": f"crm-{n}", "city": "Springfield"} for n in range(1200)]
+    assert client.put("/auth/addresses", headers=headers, json=addresses).status_code < 300
+    emitted = statements(client, "GET", "/auth/users_all", headers)
+    assert len(emitted) == 2
+    assert not any(tables(statement) == ["country_code"] for statement in emitted)